@@ -0,0 +1,769 @@
+"""
+Convert JSONL files in the bronze layer to Parquet, in place.
+
+Scraper runs from before the Parquet switch (see BaseScraper.save_batch) left
+their output as JSONL under data/bronze/. This script walks the bronze tree and
+writes a .parquet next to every .jsonl (same Hive partition, same file name),
+flattened the same way the scrapers write Parquet (nested objects become
+parent_child columns), so DuckDB/dbt can read old and new runs with one glob.
+
+Usage:
+    python scripts/convert_jsonl_to_parquet.py --dry-run
+    python scripts/convert_jsonl_to_parquet.py
+    python scripts/convert_jsonl_to_parquet.py --bronze-dir data/bronze/supermarket=bistek --delete-jsonl
+    python scripts/convert_jsonl_to_parquet.py --schema schema.json
+    python scripts/convert_jsonl_to_parquet.py --backend duckdb
+
+A --schema file maps field names to Arrow types: a type name ("string",
+"int64", "double", "bool", "timestamp[s]", ...), an object for a nested
+struct, or a one-element list for a list column:
+
+    {"productId": "string", "items": [{"itemId": "string"}], "_metadata": {"run_id": "string"}}
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable
+
+import pyarrow as pa
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingest.loaders.parquet_writer import (  # noqa: E402
+    DEFAULT_COMPRESSION,
+    DEFAULT_COMPRESSION_LEVEL,
+    PARQUET_WRITE_OPTIONS,
+    ROW_GROUP_SIZE,
+    _without_empty_structs,
+    normalize_table,
+)
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json gives the same records, slower
+    orjson = None
+
+# Leftover batch files of an interrupted run: consolidation merges them into
+# the run file, so converting them as well would duplicate the run's records
+DEFAULT_EXCLUDE_PATTERNS = ("batches",)
+
+# orjson parses bytes directly (no UTF-8 decode to str first) and is several
+# times faster than json.loads on scraper records
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Arrow's C++ reader parses JSONL straight into columns, multi-threaded,
+# one block at a time; when streaming, peak memory is bounded by a few blocks
+# regardless of file size
+_READ_OPTIONS = pajson.ReadOptions(block_size=64 << 20, use_threads=True)
+
+# Files at least this large are converted one at a time in the main process
+# instead of in a single-threaded pool worker: Arrow splits the file into
+# newline-aligned blocks and parses them on all cores, so one huge file does
+# not end up on a single core while the pool drains the small ones
+PARALLEL_PARSE_MIN_SIZE = 256 << 20
+
+# Schema reused across files is inferred from this much of the first file
+_SCHEMA_SAMPLE_OPTIONS = pajson.ReadOptions(block_size=1 << 20, use_threads=True)
+
+BACKENDS = ("arrow", "duckdb")
+
+
+def _arrow_type(description) -> pa.DataType:
+    """Arrow type for one --schema entry: type name, {struct}, or [list item]."""
+    if isinstance(description, dict):
+        return pa.struct([(name, _arrow_type(child)) for name, child in description.items()])
+    if isinstance(description, list):
+        if len(description) != 1:
+            raise ValueError(f"List type must have exactly one item type, got {description!r}")
+        return pa.list_(_arrow_type(description[0]))
+    if not isinstance(description, str):
+        raise ValueError(f"Expected a type name, object or list, got {description!r}")
+    return pa.type_for_alias(description)
+
+
+def load_schema(schema_path: Path) -> pa.Schema:
+    """Load a --schema JSON file (field name -> type) into an Arrow schema."""
+    with open(schema_path, encoding="utf-8") as f:
+        description = json.load(f)
+    if not isinstance(description, dict):
+        raise ValueError(
+            f"Expected a JSON object of field name -> type, got {type(description).__name__}"
+        )
+    return pa.schema([(name, _arrow_type(child)) for name, child in description.items()])
+
+
+def _timestamps_as_strings(data_type: pa.DataType) -> pa.DataType:
+    """
+    data_type with every timestamp replaced by string.
+
+    Arrow's JSON reader infers ISO 8601 strings (releaseDate,
+    PriceValidUntil, ...) as timestamp[s] and drops their "Z"; write_parquet
+    keeps them as the strings the API sent, so inferred timestamps are read
+    back as strings.
+    """
+    if pa.types.is_timestamp(data_type):
+        return pa.string()
+    if pa.types.is_struct(data_type):
+        return pa.struct([field.with_type(_timestamps_as_strings(field.type)) for field in data_type])
+    if pa.types.is_list(data_type):
+        return pa.list_(data_type.value_field.with_type(_timestamps_as_strings(data_type.value_type)))
+    return data_type
+
+
+def _parse_options(inferred: pa.Schema, schema: pa.Schema | None = None) -> pajson.ParseOptions | None:
+    """
+    JSON parse options that keep inferred timestamps as strings.
+
+    inferred is the schema the reader came up with; fields given in schema
+    keep their explicit type. Returns None when nothing needs to change.
+    """
+    fields = []
+    for field in inferred:
+        if schema is not None and field.name in schema.names:
+            fields.append(schema.field(field.name))
+        else:
+            fields.append(field.with_type(_timestamps_as_strings(field.type)))
+    explicit = pa.schema(fields)
+    if explicit.equals(inferred):
+        return None
+    return pajson.ParseOptions(explicit_schema=explicit, unexpected_field_behavior="infer")
+
+
+def _infer_schema(jsonl_path: Path) -> pa.Schema | None:
+    """Schema of the first records of jsonl_path, to reuse for sibling files."""
+    try:
+        with pajson.open_json(jsonl_path, read_options=_SCHEMA_SAMPLE_OPTIONS) as reader:
+            schema = reader.schema
+    except pa.ArrowInvalid as e:
+        logger.debug(f"Could not infer a schema from {jsonl_path.name} ({e})")
+        return None
+    # A field that was null in every sampled record is inferred as null, and
+    # an empty object as struct<>; as explicit types they would reject real
+    # values in the next file, so they are left to inference there
+    fields = []
+    for field in schema:
+        field_type = _without_empty_structs(field.type, drop_nulls=True)
+        if field_type is not None:
+            fields.append(field.with_type(_timestamps_as_strings(field_type)))
+    return pa.schema(fields) if fields else None
+
+
+def _store_partition(jsonl_path: Path) -> str | None:
+    """The supermarket=<store> partition a bronze file belongs to (schemas are per store)."""
+    return next((part for part in jsonl_path.parts if part.startswith("supermarket=")), None)
+
+
+def _read_jsonl_records(jsonl_path: Path) -> pa.Table:
+    """Line-by-line fallback: decode every record, then infer types over all of them."""
+    records = []
+    with open(jsonl_path, "rb") as f:
+        for line_no, line in enumerate(f, 1):
+            try:
+                records.append(_loads(line))
+            except ValueError as e:
+                # Blank lines are expected (trailing newlines); anything else is logged
+                if line.strip():
+                    logger.warning(f"Invalid JSON line {line_no} in {jsonl_path.name}: {e}")
+
+    if not records:
+        return pa.table({})
+    return pa.Table.from_struct_array(pa.array(records))
+
+
+def _widened_schema(jsonl_path: Path, schema: pa.Schema | None = None) -> pa.Schema | None:
+    """
+    One schema covering every block of a file whose types drift after the first.
+
+    Each newline-aligned block is parsed on its own with its own inference
+    and the block schemas (plus schema, if given) are unified with permissive
+    promotion: null becomes the type seen later, int64 widens to double,
+    structs gain the keys of later blocks. Only one block is in memory at a
+    time, so the file can then be streamed with the result as explicit schema.
+
+    Returns None when a block has malformed lines or the types cannot be
+    unified (e.g. a number in one block and a string in another).
+    """
+    schemas = [schema] if schema is not None else []
+    try:
+        with open(jsonl_path, "rb") as f:
+            while block := f.read(_READ_OPTIONS.block_size):
+                block += f.readline()  # finish the last line of the block
+                if not block.strip():
+                    continue
+                inferred = pajson.read_json(pa.BufferReader(block), read_options=_READ_OPTIONS).schema
+                schemas.append(pa.schema(
+                    [field.with_type(_timestamps_as_strings(field.type)) for field in inferred]
+                ))
+        return pa.unify_schemas(schemas, promote_options="permissive") if schemas else None
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.debug(f"Could not widen the schema of {jsonl_path.name} ({e})")
+        return None
+
+
+def _stream_jsonl_to_parquet(
+    jsonl_path: Path,
+    parquet_path: Path,
+    write_options: dict,
+    schema: pa.Schema | None = None,
+) -> int:
+    """
+    Convert block by block: each parsed block is normalized and appended to
+    one ParquetWriter as its own row group(s), so only a block is in memory.
+
+    With a schema, those fields are parsed with the given types (no inference
+    or promotion) and always present; fields outside it are still inferred.
+
+    Raises pa.ArrowInvalid when the file does not fit a single schema
+    inferred from its first block (new fields or type changes later on),
+    or does not match the given schema.
+    """
+    parse_options = None
+    if schema is not None:
+        parse_options = pajson.ParseOptions(explicit_schema=schema, unexpected_field_behavior="infer")
+
+    reader = pajson.open_json(jsonl_path, read_options=_READ_OPTIONS, parse_options=parse_options)
+    string_options = _parse_options(reader.schema, schema)
+    if string_options is not None:
+        # Timestamps inferred from the first block: start over reading them as strings
+        reader.close()
+        reader = pajson.open_json(jsonl_path, read_options=_READ_OPTIONS, parse_options=string_options)
+
+    writer = None
+    rows = 0
+    try:
+        with reader:
+            for batch in reader:
+                table = normalize_table(pa.Table.from_batches([batch]))
+                if writer is None:
+                    writer = pq.ParquetWriter(parquet_path, table.schema, **write_options)
+                writer.write_table(table.cast(writer.schema), row_group_size=ROW_GROUP_SIZE)
+                rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+_duckdb_connection = None
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# Detected from ISO strings; converted back to the strings the API sent,
+# as write_parquet keeps them (see _timestamps_as_strings)
+_DUCKDB_TEMPORAL_TYPES = frozenset({
+    "date", "time", "time with time zone", "timestamp", "timestamp with time zone",
+    "timestamp_s", "timestamp_ms", "timestamp_ns",
+})
+
+
+def _duckdb_type_sql(column_type) -> str:
+    """SQL for a detected DuckDB type, with dates and timestamps read as VARCHAR."""
+    if column_type.id == "struct":
+        children = ", ".join(
+            f"{_quote_identifier(child_name)} {_duckdb_type_sql(child_type)}"
+            for child_name, child_type in column_type.children
+        )
+        return f"STRUCT({children})"
+    if column_type.id == "list":
+        return f"{_duckdb_type_sql(column_type.children[0][1])}[]"
+    if column_type.id in _DUCKDB_TEMPORAL_TYPES or str(column_type) == "JSON":
+        # JSON (empty objects, all-null and mixed-type fields) is read as its text
+        return "VARCHAR"
+    return str(column_type)
+
+
+def _json_field_in_list(column_type, in_list: bool = False) -> bool:
+    """True when a struct inside a list has a JSON field (e.g. an empty object)."""
+    if column_type.id == "struct":
+        return any(
+            (in_list and str(child_type) == "JSON") or _json_field_in_list(child_type, in_list)
+            for _, child_type in column_type.children
+        )
+    if column_type.id == "list":
+        return _json_field_in_list(column_type.children[0][1], True)
+    return False
+
+
+def _flat_columns(name: str, expression: str, column_type, columns: list) -> None:
+    """(name, expression, type) leaves unrolling a DuckDB STRUCT into parent_child columns (like normalize_table)."""
+    if column_type.id == "struct":
+        for child_name, child_type in column_type.children:
+            _flat_columns(
+                f"{name}_{child_name}",
+                f"struct_extract({expression}, {_quote_literal(child_name)})",
+                child_type,
+                columns,
+            )
+    else:
+        columns.append((name, expression, column_type))
+
+
+def _duckdb_jsonl_to_parquet(
+    jsonl_path: Path,
+    parquet_path: Path,
+    compression: str,
+    compression_level: int | None,
+) -> int | None:
+    """
+    Convert with one DuckDB COPY: JSON parsing and the Parquet write run in
+    DuckDB's multi-threaded C++ pipeline, with no Python per record or block.
+
+    The schema is detected over the whole file (sample_size=-1), objects stay
+    structs (no MAP inference) and are flattened to parent_child columns in
+    the SELECT, so the column layout matches write_parquet. Path segments
+    like supermarket=... are not turned into columns.
+
+    DuckDB types empty objects as JSON. Columns that only ever hold {} are
+    dropped, as normalize_table drops empty structs; an empty object inside
+    a list cannot be dropped in the SELECT, so such files are left to the
+    Arrow path. Dates and timestamps are read as the original strings.
+
+    Returns:
+        Number of rows written, or None when DuckDB cannot read the file
+        (e.g. malformed lines), for the Arrow path to handle instead
+    """
+    global _duckdb_connection
+    import duckdb  # only loaded by the duckdb backend
+
+    if _duckdb_connection is None:
+        # Follows Arrow's CPU count: all cores in the main process, one
+        # thread in pool workers (see _init_worker)
+        _duckdb_connection = duckdb.connect(config={"threads": pa.cpu_count()})
+
+    path = _quote_literal(str(jsonl_path))
+    options = f"FORMAT parquet, COMPRESSION {compression}, ROW_GROUP_SIZE {ROW_GROUP_SIZE}"
+    if compression == "zstd" and compression_level is not None:
+        options += f", COMPRESSION_LEVEL {compression_level}"
+
+    try:
+        detected = _duckdb_connection.sql(
+            f"SELECT * FROM read_json({path}, format='newline_delimited', "
+            "hive_partitioning=false, map_inference_threshold=-1, sample_size=-1)"
+        )
+        if any(_json_field_in_list(column_type) for column_type in detected.types):
+            logger.debug(f"{jsonl_path.name} has empty or mixed-type objects inside lists, using Arrow")
+            return None
+
+        # Read again with the detected types pinned, dates and timestamps as VARCHAR
+        column_types = ", ".join(
+            f"{_quote_literal(name)}: {_quote_literal(_duckdb_type_sql(column_type))}"
+            for name, column_type in zip(detected.columns, detected.types)
+        )
+        source = (
+            f"read_json({path}, format='newline_delimited', hive_partitioning=false, "
+            f"columns={{{column_types}}})"
+        )
+        leaves = []
+        for name, column_type in zip(detected.columns, detected.types):
+            _flat_columns(name, _quote_identifier(name), column_type, leaves)
+
+        # Columns that only ever hold {} (or null) are dropped, like the empty
+        # structs normalize_table drops; all-null columns are kept, as in Arrow
+        dropped = set()
+        json_leaves = [
+            (name, expression) for name, expression, column_type in leaves
+            if str(column_type) == "JSON"
+        ]
+        if json_leaves:
+            counts = _duckdb_connection.execute(
+                "SELECT "
+                + ", ".join(
+                    f"count({expression}), count({expression}) FILTER (WHERE {expression} <> '{{}}')"
+                    for _, expression in json_leaves
+                )
+                + f" FROM {source}"
+            ).fetchone()
+            dropped = {
+                name
+                for (name, _), non_null, non_empty in zip(json_leaves, counts[0::2], counts[1::2])
+                if non_null and not non_empty
+            }
+
+        columns = [
+            f"{expression} AS {_quote_identifier(name)}"
+            for name, expression, _ in leaves
+            if name not in dropped
+        ]
+        if not columns:
+            return None
+
+        return _duckdb_connection.execute(
+            f"COPY (SELECT {', '.join(columns)} FROM {source}) "
+            f"TO {_quote_literal(str(parquet_path))} ({options})"
+        ).fetchone()[0]
+    except duckdb.Error as e:
+        logger.debug(f"DuckDB could not convert {jsonl_path.name} ({e}), using Arrow")
+        return None
+
+
+def convert_jsonl_to_parquet(
+    jsonl_path: Path,
+    delete_jsonl: bool = False,
+    compression: str = DEFAULT_COMPRESSION,
+    compression_level: int | None = DEFAULT_COMPRESSION_LEVEL,
+    jsonl_size: int | None = None,
+    schema: pa.Schema | None = None,
+    backend: str = "arrow",
+) -> int:
+    """
+    Convert one JSONL file to a Parquet file next to it.
+
+    An existing Parquet file of the same name is overwritten: skipping files
+    that are already converted is up to the caller (scan_and_convert does).
+
+    Args:
+        jsonl_path: Path to the .jsonl file
+        delete_jsonl: If True, delete the JSONL after a successful conversion
+        compression: Parquet codec (zstd, snappy, lz4, gzip)
+        compression_level: Codec level (ignored for snappy)
+        jsonl_size: Size of the JSONL in bytes, when the caller already
+            stat'ed it (saves a stat per file on large scans)
+        schema: Explicit Arrow schema for the JSON reader; a file that does
+            not match it is converted with inference instead (arrow backend)
+        backend: "arrow" (default) or "duckdb"; files DuckDB cannot read
+            go through the Arrow path
+
+    Returns:
+        Number of records written (0 if the file had no valid records)
+    """
+    parquet_path = jsonl_path.with_suffix(".parquet")
+    # Written under a temporary name and renamed into place: a killed run never
+    # leaves a truncated .parquet that the next scan would take as converted
+    tmp_path = parquet_path.with_suffix(".parquet.tmp")
+
+    if jsonl_size is None:
+        jsonl_size = jsonl_path.stat().st_size
+
+    if compression == "snappy":
+        compression_level = None  # snappy has no levels
+    write_options = {
+        "compression": compression,
+        "compression_level": compression_level,
+        **PARQUET_WRITE_OPTIONS,
+    }
+
+    # Same layout as write_parquet: no empty structs, nested objects become
+    # parent_child columns
+    try:
+        rows = None
+        if backend == "duckdb":
+            rows = _duckdb_jsonl_to_parquet(jsonl_path, tmp_path, compression, compression_level)
+            if rows is None:
+                tmp_path.unlink(missing_ok=True)
+
+        if rows is None:
+            try:
+                rows = _stream_jsonl_to_parquet(jsonl_path, tmp_path, write_options, schema)
+            except pa.ArrowInvalid as e:
+                # Schema drifts after the first block (or malformed lines): drop the
+                # partial file and stream again with a schema that fits every block
+                logger.debug(f"Streaming conversion failed on {jsonl_path.name} ({e}), widening its schema")
+                tmp_path.unlink(missing_ok=True)
+                widened = _widened_schema(jsonl_path, schema)
+                if widened is not None:
+                    try:
+                        rows = _stream_jsonl_to_parquet(jsonl_path, tmp_path, write_options, widened)
+                    except pa.ArrowInvalid as e:
+                        logger.debug(f"Widened schema did not fit {jsonl_path.name} ({e})")
+                        tmp_path.unlink(missing_ok=True)
+
+        if rows is None:
+            # Malformed lines: decode line by line, skipping the bad ones
+            table = _read_jsonl_records(jsonl_path)
+            rows = table.num_rows
+            if rows:
+                pq.write_table(
+                    normalize_table(table), tmp_path, row_group_size=ROW_GROUP_SIZE, **write_options
+                )
+
+        if rows == 0:
+            logger.warning(f"No valid records found in {jsonl_path}")
+            return 0
+
+        parquet_size = tmp_path.stat().st_size
+        os.replace(tmp_path, parquet_path)
+    finally:
+        # Only left behind when the conversion failed
+        tmp_path.unlink(missing_ok=True)
+
+    # Ratio on the raw byte counts; MB is only for display
+    reduction = 100 * (1 - parquet_size / jsonl_size) if jsonl_size else 0
+
+    logger.info(
+        f"✓ {jsonl_path.name}: {rows} records, "
+        f"{jsonl_size / 1024 / 1024:.2f} MB → {parquet_size / 1024 / 1024:.2f} MB ({reduction:.1f}% smaller)"
+    )
+
+    if delete_jsonl:
+        jsonl_path.unlink()
+        logger.debug(f"Deleted {jsonl_path}")
+
+    return rows
+
+
+def iter_jsonl(root: Path, exclude_patterns: Iterable[str] = ()):
+    """
+    Yield an os.DirEntry for every .jsonl file under root, skipping excluded paths.
+
+    Iterative os.scandir walk instead of Path.rglob: entries carry their type
+    from readdir and cache their stat, and the suffix/exclude checks run on
+    plain strings, so no Path is built for files that are not converted.
+    """
+    exclude_patterns = tuple(exclude_patterns)
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".jsonl") and not any(
+                    pattern in entry.path for pattern in exclude_patterns
+                ):
+                    yield entry
+
+
+def _close_duckdb() -> None:
+    """Close this process's DuckDB connection, if the duckdb backend opened one."""
+    global _duckdb_connection
+    if _duckdb_connection is not None:
+        _duckdb_connection.close()
+        _duckdb_connection = None
+
+
+def _init_worker() -> None:
+    """Process-pool initializer: one Arrow thread per worker process.
+
+    Parallelism comes from converting several files at once; letting every
+    worker also spawn a full-size Arrow thread pool would oversubscribe cores.
+    """
+    pa.set_cpu_count(1)
+
+
+def scan_and_convert(
+    bronze_dir: Path,
+    dry_run: bool = False,
+    delete_jsonl: bool = False,
+    exclude_patterns: Iterable[str] = DEFAULT_EXCLUDE_PATTERNS,
+    workers: int = 1,
+    compression: str = DEFAULT_COMPRESSION,
+    compression_level: int | None = DEFAULT_COMPRESSION_LEVEL,
+    schema: pa.Schema | None = None,
+    backend: str = "arrow",
+) -> dict:
+    """
+    Convert every JSONL file under bronze_dir.
+
+    Args:
+        bronze_dir: Root of the bronze layer (or any partition below it)
+        dry_run: If True, only list the files that would be converted
+        delete_jsonl: If True, delete each JSONL after it is converted
+        exclude_patterns: Skip files whose path contains any of these strings
+        workers: Number of files converted in parallel (separate processes)
+        compression: Parquet codec for the converted files
+        compression_level: Codec level (ignored for snappy)
+        schema: Explicit Arrow schema for every file. When None, the schema
+            of the first file of each store is inferred once and reused for
+            the store's other files (arrow backend)
+        backend: Conversion engine, "arrow" or "duckdb"
+
+    Returns:
+        dict with conversion stats (converted, skipped, errors, records).
+    """
+    # (path, size in bytes): the size comes from the scandir entry and is
+    # reused for the dry-run listing and the conversion log
+    jsonl_files = sorted(
+        (Path(entry.path), entry.stat().st_size)
+        for entry in iter_jsonl(bronze_dir, exclude_patterns)
+    )
+    found = len(jsonl_files)
+
+    # Drop already-converted files up front: on incremental runs most files
+    # are done, and the worker pool and progress counter only see real work
+    jsonl_files = [
+        (jsonl_path, jsonl_size) for jsonl_path, jsonl_size in jsonl_files
+        if not jsonl_path.with_suffix(".parquet").exists()
+    ]
+    total = len(jsonl_files)
+    stats = {"converted": 0, "skipped": found - total, "errors": 0, "records": 0}
+
+    logger.info(
+        f"Found {found} JSONL files under {bronze_dir} "
+        f"({stats['skipped']} already converted, {total} to convert)"
+    )
+
+    if dry_run:
+        for i, (jsonl_path, jsonl_size) in enumerate(jsonl_files, 1):
+            size_mb = jsonl_size / 1024 / 1024
+            logger.info(f"[DRY RUN] [{i}/{total}] Would convert {jsonl_path} ({size_mb:.2f} MB)")
+        return stats
+
+    # One schema per store: parsing is single-pass with fixed types, and all
+    # of a store's files come out with the same columns and types
+    schemas = {}
+    if schema is None and backend == "arrow":
+        for jsonl_path, _ in jsonl_files:
+            store = _store_partition(jsonl_path)
+            if store not in schemas:
+                schemas[store] = _infer_schema(jsonl_path)
+
+    def schema_for(jsonl_path: Path) -> pa.Schema | None:
+        return schema if schema is not None else schemas.get(_store_partition(jsonl_path))
+
+    def record(i: int, jsonl_path: Path, convert) -> None:
+        try:
+            count = convert()
+        except Exception as e:
+            stats["errors"] += 1
+            logger.error(f"[{i}/{total}] Failed to convert {jsonl_path}: {e}")
+            return
+        if count:
+            stats["converted"] += 1
+            stats["records"] += count
+        else:
+            stats["skipped"] += 1
+
+    in_process, pooled = jsonl_files, []
+    if workers > 1 and total > 1:
+        # Files are independent: convert them in parallel, one per process.
+        # Large files stay here, where Arrow parses their blocks on all cores
+        in_process = [f for f in jsonl_files if f[1] >= PARALLEL_PARSE_MIN_SIZE]
+        pooled = [f for f in jsonl_files if f[1] < PARALLEL_PARSE_MIN_SIZE]
+
+    done = 0
+    for jsonl_path, jsonl_size in in_process:
+        done += 1
+        record(done, jsonl_path, lambda: convert_jsonl_to_parquet(
+            jsonl_path, delete_jsonl, compression, compression_level, jsonl_size,
+            schema_for(jsonl_path), backend,
+        ))
+
+    if pooled:
+        # Workers are forked from this process: do not hand them the
+        # connection (and its thread pool) used for the large files
+        _close_duckdb()
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pooled)), initializer=_init_worker
+        ) as executor:
+            futures = {
+                executor.submit(
+                    convert_jsonl_to_parquet,
+                    jsonl_path, delete_jsonl, compression, compression_level, jsonl_size,
+                    schema_for(jsonl_path), backend,
+                ): jsonl_path
+                for jsonl_path, jsonl_size in pooled
+            }
+            for future in as_completed(futures):
+                done += 1
+                record(done, futures[future], future.result)
+
+    logger.info(
+        f"Done: {stats['converted']} converted, {stats['skipped']} skipped, "
+        f"{stats['errors']} errors ({stats['records']:,} records)"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert bronze JSONL files to Parquet")
+    parser.add_argument(
+        "--bronze-dir",
+        type=Path,
+        default=Path("data/bronze"),
+        help="Directory to scan recursively for .jsonl files (default: data/bronze)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Dry run - list files without converting"
+    )
+    parser.add_argument(
+        "--delete-jsonl",
+        action="store_true",
+        help="Delete each JSONL file after it is converted successfully"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files to convert in parallel (default: CPU count)"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["zstd", "snappy", "lz4", "gzip"],
+        default=DEFAULT_COMPRESSION,
+        help=f"Parquet compression codec (default: {DEFAULT_COMPRESSION})"
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        default=DEFAULT_COMPRESSION_LEVEL,
+        help=f"Codec level, ignored for snappy (default: {DEFAULT_COMPRESSION_LEVEL})"
+    )
+    parser.add_argument(
+        "--schema",
+        type=Path,
+        default=None,
+        help="JSON file with the Arrow schema of the records (default: inferred per store)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="arrow",
+        help="Conversion engine: arrow (default) or duckdb (one COPY per file)"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        help=f"Skip paths containing this string (repeatable, default: {', '.join(DEFAULT_EXCLUDE_PATTERNS)})"
+    )
+
+    args = parser.parse_args()
+
+    if not args.bronze_dir.exists():
+        logger.error(f"Bronze directory not found: {args.bronze_dir}")
+        sys.exit(1)
+
+    if args.schema is not None and args.backend != "arrow":
+        logger.warning(f"--schema only applies to the arrow backend, ignored with --backend {args.backend}")
+
+    schema = None
+    if args.schema is not None and args.backend == "arrow":
+        try:
+            schema = load_schema(args.schema)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Invalid schema file {args.schema}: {e}")
+            sys.exit(1)
+
+    stats = scan_and_convert(
+        bronze_dir=args.bronze_dir,
+        dry_run=args.dry_run,
+        delete_jsonl=args.delete_jsonl,
+        exclude_patterns=args.exclude if args.exclude is not None else DEFAULT_EXCLUDE_PATTERNS,
+        workers=args.workers,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        schema=schema,
+        backend=args.backend,
+    )
+
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Precompile the VTEX Pydantic schemas into a pickled validator cache.
+
+Building the core schema for VTEXProduct walks every nested model and
+validator on each interpreter start. Scrapers run as short-lived scheduled
+jobs, so the built validators are pickled once (after install / deploy) to
+src/schemas/_vtex_cache.pkl and loaded by src.schemas.vtex on import.
+
+The cache is keyed on the schema module's source and the pydantic-core
+version: after editing src/schemas/vtex.py or upgrading pydantic it is
+ignored (schemas are built as usual) until this script is re-run.
+
+Usage:
+    python scripts/setup/precompile_schemas.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.schemas.vtex import SCHEMA_CACHE_PATH, dump_schema_cache
+
+
+def main():
+    payload = dump_schema_cache()
+    SCHEMA_CACHE_PATH.write_bytes(payload)
+    print(f"Wrote {SCHEMA_CACHE_PATH} ({len(payload) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -204,7 +204,7 @@ class EANEnrichmentPipeline:
             items=products,
             output_path=output_path,  # Pass Path object, not string
             metadata=metadata,
-            compression="snappy"
+            compression="zstd"
         )
 
         logger.info(f"Saved {record_count} products successfully")
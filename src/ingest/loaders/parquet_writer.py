@@ -2,62 +2,128 @@
 Parquet writer helper for efficient columnar storage.
 
 Features:
-- DataFrame conversion from VTEX API responses
-- Snappy compression (fast, ~80-90% size reduction)
+- Arrow table conversion from VTEX API responses (nested objects flattened)
+- ZSTD compression (level 3: 20-40% smaller than Snappy, comparable decode speed)
 - Schema inference with type hints
 - Metadata injection (run_id, supermarket, region)
 """
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 
+# Bronze files are written once and scanned many times by DuckDB/dbt, so
+# trade a little write CPU for smaller files. Readers need pyarrow>=4.0.
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_COMPRESSION_LEVEL = 3
 
-def _clean_empty_structs(obj: Any) -> Any:
+# Layout for downstream scans: dictionary-encoded columns (store/region/brand
+# strings repeat on every row), ~1M-row row groups with min/max statistics
+# for predicate pushdown, 1 MB data pages. Pinned explicitly rather than
+# relying on pyarrow's defaults staying the same.
+ROW_GROUP_SIZE = 1_000_000
+PARQUET_WRITE_OPTIONS = {
+    "use_dictionary": True,
+    "data_page_size": 1 << 20,
+    "write_statistics": True,
+}
+
+
+def _compression_level(compression: str, level: Optional[int]) -> Optional[int]:
+    """Level to hand to pyarrow, dropped for codecs without levels (e.g. snappy)."""
+    if level is None or compression.lower() == "none":
+        return None
+    return level if pa.Codec.supports_compression_level(compression) else None
+
+
+def _without_empty_structs(data_type: pa.DataType, drop_nulls: bool = False) -> Optional[pa.DataType]:
     """
-    Recursively remove empty dict/struct fields from nested data.
+    Return data_type with every empty struct removed (None if nothing is left).
+
+    PyArrow cannot serialize empty struct types (dicts with no keys) to Parquet,
+    so they are stripped from the inferred schema before writing. With
+    drop_nulls, null types (fields that were null in every record) are
+    removed as well.
+
+    Example:
+        >>> _without_empty_structs(pa.struct([("a", pa.int64()), ("b", pa.struct([]))]))
+        StructType(struct<a: int64>)
+    """
+    if drop_nulls and pa.types.is_null(data_type):
+        return None
+    if pa.types.is_struct(data_type):
+        fields = []
+        for field in data_type:
+            child_type = _without_empty_structs(field.type, drop_nulls)
+            if child_type is not None:
+                fields.append(field.with_type(child_type))
+        return pa.struct(fields) if fields else None
+    if pa.types.is_list(data_type):
+        value_type = _without_empty_structs(data_type.value_type, drop_nulls)
+        if value_type is None:
+            return None
+        return pa.list_(data_type.value_field.with_type(value_type))
+    return data_type
+
+
+def _flatten_column(name: str, column: pa.ChunkedArray, names: list, columns: list) -> None:
+    """Unroll a struct column into parent_child columns (json_normalize sep="_")."""
+    if pa.types.is_struct(column.type):
+        for field, child in zip(column.type, column.flatten()):
+            _flatten_column(f"{name}_{field.name}", child, names, columns)
+    else:
+        names.append(name)
+        columns.append(column)
 
-    PyArrow cannot serialize empty struct types (dicts with no keys) to Parquet.
-    This function removes them before serialization.
+
+def normalize_table(table: pa.Table) -> pa.Table:
+    """
+    Drop empty structs and flatten nested objects into parent_child columns.
+
+    Same column layout pd.json_normalize(sep="_") produced, but done on Arrow
+    buffers in C++ instead of walking every record dict in Python. Lists are
+    kept as list columns (json_normalize does not expand them either). Column
+    names are joined directly rather than via Table.flatten()'s "." so keys
+    that contain a dot are left alone.
+
+    Types are Arrow's, not pandas': an integer field with nulls stays int64
+    (json_normalize made it float64, e.g. brandId), strings are string rather
+    than large_string, and no pandas schema metadata is written.
 
     Args:
-        obj: Any Python object (dict, list, primitive)
+        table: Arrow table, possibly with nested struct columns
 
     Returns:
-        Cleaned object with empty dicts removed
+        Flat table ready to be written to Parquet
 
-    Example:
-        >>> data = {"a": 1, "b": {}, "c": {"d": {}}}
-        >>> _clean_empty_structs(data)
-        {"a": 1, "c": {}}
+    Raises:
+        ValueError: If the table has rows but every column is an empty
+            struct (nothing could be written for them)
     """
-    if isinstance(obj, dict):
-        # Remove keys with empty dict values, recursively clean others
-        cleaned = {}
-        for key, value in obj.items():
-            if isinstance(value, dict) and not value:
-                # Skip empty dicts (empty structs)
-                continue
-            else:
-                # Recursively clean the value
-                cleaned[key] = _clean_empty_structs(value)
-        return cleaned
-
-    elif isinstance(obj, list):
-        # Recursively clean list elements
-        return [_clean_empty_structs(item) for item in obj]
-
-    else:
-        # Primitives (str, int, float, bool, None) - return as-is
-        return obj
+    fields = []
+    for field in table.schema:
+        field_type = _without_empty_structs(field.type)
+        if field_type is not None:
+            fields.append(field.with_type(field_type))
+    if not fields and table.num_rows:
+        raise ValueError(f"{table.num_rows} rows but no columns left after dropping empty objects")
+    schema = pa.schema(fields)
+    table = table.select(schema.names).cast(schema)
+
+    names, columns = [], []
+    for name, column in zip(table.column_names, table.columns):
+        _flatten_column(name, column, names, columns)
+    return pa.table(columns, names=names)
 
 
 def write_parquet(
     items: List[Dict[str, Any]],
     output_path: Path,
     metadata: Dict[str, Any] = None,
-    compression: str = "snappy"
+    compression: str = DEFAULT_COMPRESSION,
+    compression_level: Optional[int] = DEFAULT_COMPRESSION_LEVEL
 ) -> int:
     """
     Write list of items to Parquet file with metadata injection.
@@ -66,7 +132,8 @@ def write_parquet(
         items: List of product dictionaries (VTEX API response)
         output_path: Path to output .parquet file
         metadata: Optional metadata to inject into each record
-        compression: Compression codec (snappy, gzip, zstd)
+        compression: Compression codec (zstd, snappy, lz4, gzip)
+        compression_level: Codec level (ignored by codecs without levels)
 
     Returns:
         Number of records written
@@ -88,27 +155,27 @@ def write_parquet(
                 item["_metadata"] = {}
             item["_metadata"].update(metadata)
 
-    # Clean empty structs before DataFrame conversion
-    # PyArrow cannot serialize empty dicts (structs with no child fields)
-    cleaned_items = [_clean_empty_structs(item) for item in items]
-
-    # Convert to DataFrame
     try:
-        df = pd.json_normalize(cleaned_items, sep="_")
+        # Build the table straight from the dicts (pa.array infers the union
+        # of keys over all items; Table.from_pylist would only use the first
+        # item's keys), then flatten nested objects in Arrow
+        table = normalize_table(pa.Table.from_struct_array(pa.array(items)))
 
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Write Parquet with compression
-        df.to_parquet(
+        pq.write_table(
+            table,
             output_path,
-            engine="pyarrow",
             compression=compression,
-            index=False
+            compression_level=_compression_level(compression, compression_level),
+            row_group_size=ROW_GROUP_SIZE,
+            **PARQUET_WRITE_OPTIONS,
         )
 
-        logger.debug(f"Wrote {len(df)} records to {output_path.name} ({compression} compression)")
-        return len(df)
+        logger.debug(f"Wrote {table.num_rows} records to {output_path.name} ({compression} compression)")
+        return table.num_rows
 
     except Exception as e:
         logger.error(f"Failed to write Parquet to {output_path}: {e}")
@@ -119,7 +186,9 @@ def consolidate_parquet_files(
     input_dir: Path,
     output_file: Path,
     pattern: str = "*.parquet",
-    delete_batches: bool = True
+    delete_batches: bool = True,
+    compression: str = DEFAULT_COMPRESSION,
+    compression_level: Optional[int] = DEFAULT_COMPRESSION_LEVEL
 ) -> int:
     """
     Consolidate multiple Parquet batch files into a single file.
@@ -129,6 +198,8 @@ def consolidate_parquet_files(
         output_file: Output consolidated Parquet file
         pattern: Glob pattern for batch files
         delete_batches: If True, delete batch files after successful consolidation
+        compression: Compression codec for the consolidated file
+        compression_level: Codec level (ignored by codecs without levels)
 
     Returns:
         Total number of records consolidated
@@ -139,32 +210,35 @@ def consolidate_parquet_files(
         logger.warning(f"No Parquet files found in {input_dir} with pattern {pattern}")
         return 0
 
-    # Read all batches into a single DataFrame
-    dfs = []
+    # Read all batches as Arrow tables (columnar, no pandas round-trip)
+    tables = []
     for batch_file in batch_files:
         try:
-            df = pd.read_parquet(batch_file, engine="pyarrow")
-            dfs.append(df)
+            tables.append(pq.read_table(batch_file))
         except Exception as e:
             logger.error(f"Failed to read {batch_file}: {e}")
             continue
 
-    if not dfs:
+    if not tables:
         logger.error("No valid Parquet files could be read")
         return 0
 
-    # Concatenate and write
-    consolidated = pd.concat(dfs, ignore_index=True)
+    # Concatenate and write. Batches may disagree on columns/types (a field
+    # that is all-null in one batch, a nested struct with extra keys in
+    # another): permissive promotion unifies them like pd.concat did
+    consolidated = pa.concat_tables(tables, promote_options="permissive")
 
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    consolidated.to_parquet(
+    pq.write_table(
+        consolidated,
         output_file,
-        engine="pyarrow",
-        compression="snappy",
-        index=False
+        compression=compression,
+        compression_level=_compression_level(compression, compression_level),
+        row_group_size=ROW_GROUP_SIZE,
+        **PARQUET_WRITE_OPTIONS,
     )
 
-    logger.info(f"Consolidated {len(dfs)} files -> {output_file.name} ({len(consolidated)} records)")
+    logger.info(f"Consolidated {len(tables)} files -> {output_file.name} ({consolidated.num_rows} records)")
 
     # Delete batch files after successful consolidation
     if delete_batches:
@@ -183,4 +257,4 @@ def consolidate_parquet_files(
         except Exception as e:
             logger.debug(f"Could not delete batches dir: {e}")
 
-    return len(consolidated)
+    return consolidated.num_rows
@@ -714,8 +714,8 @@ class CarrefourHTMLScraper(BaseScraper):
                     if product:
                         # Validate with Pydantic
                         try:
-                            validated = VTEXProduct.parse_obj(product)
-                            validated_products.append(validated.dict())
+                            validated = VTEXProduct.model_validate(product)
+                            validated_products.append(validated.model_dump())
                         except ValidationError:
                             self.validation_errors_count += 1
 
@@ -770,8 +770,8 @@ class CarrefourHTMLScraper(BaseScraper):
                 if product:
                     # Validate with Pydantic
                     try:
-                        validated = VTEXProduct.parse_obj(product)
-                        validated_products.append(validated.dict())
+                        validated = VTEXProduct.model_validate(product)
+                        validated_products.append(validated.model_dump())
                     except ValidationError as e:
                         logger.warning(f"Validation failed for {url}: {e}")
                         self.validation_errors_count += 1
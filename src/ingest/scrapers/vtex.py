@@ -11,22 +11,59 @@ And two scraping modes:
   - global_discovery=false: Iterate departments per region (Giassi-style)
 """
 
+import asyncio
 import json
 import re
+import sys
 import time
 import base64
+import io
 import xml.etree.ElementTree as ET
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import aiohttp
+import requests
 from loguru import logger
-from pydantic import ValidationError
+from pydantic import ConfigDict, TypeAdapter, ValidationError
+from pydantic_core import from_json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .base import BaseScraper
 from .rate_limiter import get_rate_limiter
 from src.observability.metrics import get_metrics_collector
 from src.schemas.vtex import VTEXProduct
 
+# Built once: reusing the adapter's SchemaValidator lets pydantic-core validate
+# a whole API page in a single call instead of once per product.
+# cache_strings="keys": the same few dozen field names repeat in every
+# product/item/seller dict, so parsing reuses one str object per key name
+# (values such as names and URLs are mostly unique and not worth caching)
+_PRODUCT_LIST_ADAPTER = TypeAdapter(
+    List[VTEXProduct], config=ConfigDict(cache_strings="keys")
+)
+
+_SITEMAP_LOC_TAG = "{http://www.sitemaps.org/schemas/sitemap/0.9}loc"
+_PRODUCT_ID_RE = re.compile(r"-(\d+)/p")
+
+
+def _intern_keys(value: Any) -> Any:
+    """Rebuild nested dicts with interned str keys.
+
+    Dicts built by callers (rather than parsed by pydantic-core) carry a
+    fresh str per key; interning lets dict lookups on field names match
+    by identity before falling back to a string compare.
+    """
+    if isinstance(value, dict):
+        return {
+            sys.intern(k) if isinstance(k, str) else k: _intern_keys(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_intern_keys(v) for v in value]
+    return value
+
 
 class SitemapNotAvailableError(Exception):
     """Raised when sitemap discovery fails (404, parse error, etc)."""
@@ -36,9 +73,14 @@ class SitemapNotAvailableError(Exception):
 class RegionResolver:
     """Builds VTEX segment cookies that control region-specific pricing."""
 
+    __slots__ = ("session", "base_url", "_cookie_cache")
+
     def __init__(self, session, base_url: str):
         self.session = session
         self.base_url = base_url
+        # Cookies per (postal_code, sales_channel, manual_region_id); a region
+        # is reused for every batch, so the regions API is hit once per region
+        self._cookie_cache: dict[tuple[str, str, str | None], str] = {}
 
     def get_segment_cookie(
         self,
@@ -46,6 +88,11 @@ class RegionResolver:
         sales_channel: str = "1",
         manual_region_id: str | None = None,
     ) -> str | None:
+        cache_key = (postal_code, sales_channel, manual_region_id)
+        cached = self._cookie_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         region_id = manual_region_id
 
         if not region_id:
@@ -57,7 +104,7 @@ class RegionResolver:
             try:
                 resp = self.session.get(url, timeout=10)
                 if resp.status_code == 200:
-                    data = resp.json()
+                    data = from_json(resp.content)
                     if isinstance(data, list) and data:
                         region_id = data[0].get("id")
                         if not region_id and "sellers" in data[0]:
@@ -82,10 +129,15 @@ class RegionResolver:
             "cultureInfo": "pt-BR",
             "channelPrivacy": "public",
         }
-        return base64.b64encode(
+        cookie = base64.b64encode(
             json.dumps(payload, separators=(",", ":")).encode()
         ).decode()
 
+        # Only cache resolved regions so a failed lookup is retried next time
+        if region_id:
+            self._cookie_cache[cache_key] = cookie
+        return cookie
+
 
 class VTEXScraper(BaseScraper):
     def __init__(self, store_name: str, config: dict):
@@ -100,9 +152,34 @@ class VTEXScraper(BaseScraper):
         self.max_workers = config.get("max_workers", 1)  # Parallel regions
         self.rate_limiter = get_rate_limiter()  # Global VTEX rate limiter
 
+        # Concurrent batch fetching within a region (aiohttp)
+        self.use_async = config.get("use_async", False)
+        self.max_concurrent_requests = config.get("max_concurrent_requests", 10)
+
+    def _create_session(self) -> requests.Session:
+        session = super()._create_session()
+        # Paging loops run back to back (gated by the global rate limiter):
+        # throttling/5xx responses are retried by the adapter with jittered
+        # backoff (honouring Retry-After) instead of sleeping after every page,
+        # and a bigger pool keeps connections warm across region threads
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            backoff_jitter=0.25,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+        )
+        session.mount(
+            "https://",
+            HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=50),
+        )
+        return session
+
     # ── Data Quality (Phase 2) ──────────────────────────────────
 
-    def validate_products(self, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def validate_products(
+        self, products: List[Dict[str, Any]] | bytes
+    ) -> List[Dict[str, Any]]:
         """
         Validate products using Pydantic schemas.
 
@@ -110,21 +187,124 @@ class VTEXScraper(BaseScraper):
         from reaching the bronze layer.
 
         Args:
-            products: List of product dictionaries from VTEX API
+            products: List of product dictionaries from VTEX API, or the raw
+                JSON response body (bytes), which is parsed by pydantic-core
+                without a separate ``response.json()`` pass
 
         Returns:
             List of validated product dictionaries (invalid products removed)
         """
+        if isinstance(products, (bytes, bytearray)):
+            try:
+                # Fast path: pydantic-core parses and validates the whole body
+                models = _PRODUCT_LIST_ADAPTER.validate_json(products)
+                return _PRODUCT_LIST_ADAPTER.dump_python(models)
+            except ValidationError:
+                # At least one product is invalid; re-run on the parsed list
+                # so failures can be attributed and logged per product
+                try:
+                    products = from_json(products, cache_strings="keys")
+                except ValueError as e:
+                    # Truncated or non-JSON body: nothing in it can be saved
+                    logger.error(
+                        f"[{self.store_name}] Invalid JSON in API response, skipping batch: {e}"
+                    )
+                    return []
+            if not isinstance(products, list):
+                # e.g. an error object instead of the product list
+                logger.error(
+                    f"[{self.store_name}] Expected a product list in API response, "
+                    f"got {type(products).__name__}, skipping batch"
+                )
+                return []
+        else:
+            products = [_intern_keys(p) for p in products]
+
+        try:
+            models = _PRODUCT_LIST_ADAPTER.validate_python(products)
+        except ValidationError as e:
+            failed = self._log_validation_failures(products, e)
+            if not failed:
+                # No error points at a product: let the per-product path sort it out
+                return self._validate_products_one_by_one(products)
+            survivors = [p for i, p in enumerate(products) if i not in failed]
+            models = _PRODUCT_LIST_ADAPTER.validate_python(survivors)
+        except (TypeError, KeyError, AttributeError) as e:
+            # Malformed payload outside what the schema reports (pydantic-core
+            # raises ValidationError for bad data): validate one by one so a
+            # single odd payload does not drop the whole batch
+            logger.debug(f"Batch validation failed ({e}), validating per product")
+            return self._validate_products_one_by_one(products)
+
+        # One dump call for the whole batch: plain dicts go straight to the
+        # Arrow writer in save_batch, without a JSON round-trip
+        validated = _PRODUCT_LIST_ADAPTER.dump_python(models)
+
+        # Log summary if any products were invalid
+        if len(validated) < len(products):
+            skipped = len(products) - len(validated)
+            logger.info(
+                f"Validation complete: {len(validated)}/{len(products)} products valid "
+                f"({skipped} skipped due to validation errors)"
+            )
+
+        return validated
+
+    def _log_validation_failures(
+        self, products: List[Dict[str, Any]], error: ValidationError
+    ) -> set[int]:
+        """Log each failing product of a batch and return the failing indices."""
+        errors_by_index: Dict[int, list] = {}
+        batch_errors = []
+        # include_url/include_input=False: skip building the docs URL and
+        # echoing the (large) offending input into every error dict
+        for err in error.errors(include_url=False, include_input=False):
+            loc = err["loc"]
+            index = loc[0] if loc else None
+            if isinstance(index, int) and 0 <= index < len(products):
+                errors_by_index.setdefault(index, []).append(err)
+            else:
+                # Not tied to one product (e.g. the batch itself is not a list)
+                batch_errors.append(err)
+
+        if batch_errors:
+            logger.warning(
+                f"[{self.store_name}] Batch validation failed outside any product",
+                extra={"validation_errors": batch_errors, "store": self.store_name, "run_id": self.run_id}
+            )
+
+        for index, product_errors in errors_by_index.items():
+            product = products[index]
+            product_id = product.get('productId', 'unknown') if isinstance(product, dict) else 'unknown'
+            product_name = product.get('productName', 'unknown') if isinstance(product, dict) else 'unknown'
+
+            logger.warning(
+                f"Product validation failed: {product_id} - {product_name}",
+                extra={
+                    "product_id": product_id,
+                    "validation_errors": product_errors,
+                    "store": self.store_name,
+                    "run_id": self.run_id
+                }
+            )
+
+        self.validation_errors_count += len(errors_by_index)
+        return set(errors_by_index)
+
+    def _validate_products_one_by_one(
+        self, products: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Per-product fallback for validate_products."""
         validated = []
+        # Bound once: attribute lookups would otherwise run on every product
+        validate = VTEXProduct.model_validate
+        append = validated.append
+        errors = 0
 
         for product in products:
             try:
-                # Validate using Pydantic
-                validated_product = VTEXProduct.parse_obj(product)
-                # Convert back to dict for downstream processing
-                validated.append(validated_product.dict())
+                append(validate(product).model_dump())
             except ValidationError as e:
-                # Log validation error with context
                 product_id = product.get('productId', 'unknown')
                 product_name = product.get('productName', 'unknown')
 
@@ -132,17 +312,14 @@ class VTEXScraper(BaseScraper):
                     f"Product validation failed: {product_id} - {product_name}",
                     extra={
                         "product_id": product_id,
-                        "validation_errors": e.errors(),
+                        "validation_errors": e.errors(include_url=False, include_input=False),
                         "store": self.store_name,
                         "run_id": self.run_id
                     }
                 )
-
-                self.validation_errors_count += 1
-                # Skip invalid product
-                continue
-            except Exception as e:
-                # Unexpected error during validation
+                errors += 1
+            except (TypeError, KeyError, AttributeError) as e:
+                # Malformed input the schema could not even inspect
                 logger.error(
                     f"Unexpected error validating product: {e}",
                     extra={
@@ -151,20 +328,11 @@ class VTEXScraper(BaseScraper):
                         "run_id": self.run_id
                     }
                 )
-                self.validation_errors_count += 1
-                continue
-
-        # Log summary if any products were invalid
-        if len(validated) < len(products):
-            skipped = len(products) - len(validated)
-            logger.info(
-                f"Validation complete: {len(validated)}/{len(products)} products valid "
-                f"({skipped} skipped due to validation errors)"
-            )
+                errors += 1
 
+        self.validation_errors_count += errors
         return validated
-    
-    
+
     def scrape_region(self, region_key: str, product_urls: list[str]):
         """
         Implementação do método obrigatório da BaseScraper.
@@ -325,10 +493,13 @@ class VTEXScraper(BaseScraper):
         """
         logger.info(f"[{self.store_name}] Discovering via sitemap...")
         self.session.cookies.clear()
-        discovered = set()
+        # dict keys as an insertion-ordered set: duplicates across sitemap
+        # pages are dropped in one pass while keeping sitemap order
+        discovered: Dict[str, None] = {}
         start_idx = self.config.get("sitemap_start_index", 0)
         idx = start_idx
         pattern = self.config.get("sitemap_pattern", "/sitemap/product-{n}.xml")
+        previous_page = None
 
         while True:
             url = f"{self.base_url}{pattern.replace('{n}', str(idx))}"
@@ -343,18 +514,33 @@ class VTEXScraper(BaseScraper):
                         )
                     # Otherwise, we've reached the end of sitemaps (normal)
                     break
+                if resp.content == previous_page:
+                    # Same body served for any index: past the last sitemap
+                    break
+                previous_page = resp.content
 
-                root = ET.fromstring(resp.content)
-                ns = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+                # Stream <loc> elements instead of building the whole DOM;
+                # product sitemaps carry tens of thousands of URLs each
                 count_before = len(discovered)
-                for loc in root.findall(".//s:loc", ns):
-                    match = re.search(r"-(\d+)/p", loc.text)
-                    if match:
-                        discovered.add(match.group(1))
+                page_ids = 0
+                for _, elem in ET.iterparse(io.BytesIO(resp.content), events=("end",)):
+                    if elem.tag == _SITEMAP_LOC_TAG:
+                        match = _PRODUCT_ID_RE.search(elem.text or "")
+                        if match:
+                            discovered[match.group(1)] = None
+                            page_ids += 1
+                    elem.clear()
                 logger.info(
                     f"  sitemap-{idx}: +{len(discovered) - count_before} "
                     f"(total: {len(discovered)})"
                 )
+                # A page without any product URL (e.g. a catch-all page served
+                # with 200 past the last sitemap) ends the walk; a page made
+                # only of already-seen IDs does not
+                if page_ids == 0:
+                    break
+                if limit and len(discovered) >= limit:
+                    break
                 idx += 1
             except SitemapNotAvailableError:
                 # Re-raise sitemap not available
@@ -393,7 +579,9 @@ class VTEXScraper(BaseScraper):
                 self.session.cookies.set("vtex_segment", cookie)
 
         dept_ids = self._get_department_ids()
-        discovered = set()
+        # Ordered dedup (same product shows up under several departments);
+        # keeps IDs clustered by department for the batch requests
+        discovered: Dict[str, None] = {}
         api_url = f"{self.base_url}/api/catalog_system/pub/products/search"
 
         for dept_id in dept_ids:
@@ -412,21 +600,22 @@ class VTEXScraper(BaseScraper):
                     ]["sc"],
                 }
                 try:
-                    resp = self.session.get(api_url, params=params, timeout=15)
+                    with self.rate_limiter.limit():
+                        resp = self.session.get(api_url, params=params, timeout=15)
                     if resp.status_code not in [200, 206]:
                         break
-                    items = resp.json()
+                    items = from_json(resp.content, cache_strings="keys")
                     if not items:
                         break
-                    new_ids = {i["productId"] for i in items if "productId" in i}
-                    discovered.update(new_ids)
+                    discovered.update(
+                        dict.fromkeys(i["productId"] for i in items if "productId" in i)
+                    )
                     start += 50
                     if len(items) < 50:
                         break
                 except Exception as e:
                     logger.warning(f"Category discovery error for dept {dept_id} at offset {start}: {e}")
                     break
-                time.sleep(self.request_delay)
             logger.info(f"  dept {dept_id}: total unique IDs = {len(discovered)}")
 
         result = list(discovered)
@@ -436,7 +625,7 @@ class VTEXScraper(BaseScraper):
         try:
             url = f"{self.base_url}/api/catalog_system/pub/category/tree/3"
             resp = self.session.get(url, timeout=15)
-            return [c["id"] for c in resp.json()]
+            return [c["id"] for c in from_json(resp.content)]
         except Exception as e:
             logger.error(f"Failed to fetch category tree: {e}")
             return []
@@ -461,6 +650,9 @@ class VTEXScraper(BaseScraper):
 
     def _scrape_by_ids(self, region_key: str, product_ids: list[str]):
         """Global discovery mode: batch-fetch products by ID per region."""
+        if self.use_async:
+            return asyncio.run(self._scrape_by_ids_async(region_key, product_ids))
+
         cfg = self.regions[region_key]
         logger.info(
             f"[{self.store_name}/{region_key}] Scraping {len(product_ids)} products "
@@ -496,12 +688,13 @@ class VTEXScraper(BaseScraper):
 
             with metrics.track_batch(batch_number, region=region_key) as batch:
                 try:
-                    resp = self.session.get(api_url, params=params, timeout=20)
+                    with self.rate_limiter.limit():
+                        resp = self.session.get(api_url, params=params, timeout=20)
                     batch.api_status_code = resp.status_code
                     if resp.status_code in [200, 206]:
-                        items = resp.json()
                         # Phase 2: Validate products before saving
-                        validated_items = self.validate_products(items)
+                        # (raw bytes: pydantic-core parses, no response.json())
+                        validated_items = self.validate_products(resp.content)
                         batch.products_count = len(validated_items)
                         if validated_items:
                             self.save_batch(validated_items, batch_file, region_key)
@@ -514,7 +707,6 @@ class VTEXScraper(BaseScraper):
 
             if i % 500 == 0 and i > 0:
                 logger.info(f"  progress: {i}/{len(product_ids)}")
-            time.sleep(self.request_delay)
 
         self.consolidate_batches(batches_dir, final_file)
         self.validate_run(region_key, final_file)
@@ -526,7 +718,9 @@ class VTEXScraper(BaseScraper):
         Each thread gets its own session to avoid race conditions.
         Uses global rate limiter to respect VTEX API limits.
         """
-        import requests  # Import here for thread-local session
+        if self.use_async:
+            # Each region thread runs its own event loop
+            return asyncio.run(self._scrape_by_ids_async(region_key, product_ids))
 
         cfg = self.regions[region_key]
         logger.info(
@@ -534,13 +728,12 @@ class VTEXScraper(BaseScraper):
             f"(CEP={cfg['cep']}, SC={cfg['sc']}) [PARALLEL]"
         )
 
-        # Create thread-local session
-        session = requests.Session()
+        # Create thread-local session (same retrying, pooled adapter)
+        session = self._create_session()
         session.headers.update(self.session.headers)  # Copy headers from main session
 
-        # Set region cookie
-        resolver = RegionResolver(session, self.base_url)
-        cookie = resolver.get_segment_cookie(cfg["cep"], cfg["sc"], cfg.get("hub_id"))
+        # Set region cookie (shared resolver: cookies are cached across threads)
+        cookie = self.resolver.get_segment_cookie(cfg["cep"], cfg["sc"], cfg.get("hub_id"))
         if not cookie:
             logger.error(f"Failed to build cookie for {region_key}")
             return
@@ -581,15 +774,17 @@ class VTEXScraper(BaseScraper):
                         resp = session.get(api_url, params=params, timeout=20)
                         batch.api_status_code = resp.status_code
                         if resp.status_code in [200, 206]:
-                            items = resp.json()
                             # Phase 2: Validate products before saving
-                            validated_items = self.validate_products(items)
+                            # (raw bytes: pydantic-core parses, no response.json())
+                            errors_before = self.validation_errors_count
+                            validated_items = self.validate_products(resp.content)
                             batch.products_count = len(validated_items)
                             if validated_items:
                                 self.save_batch(validated_items, batch_file, region_key)
-                            elif len(items) > 0:
+                            elif self.validation_errors_count > errors_before:
                                 # Log warning only if API returned products but all failed validation
-                                logger.warning(f"[{region_key}] All {len(items)} products in batch {batch_number} failed validation")
+                                failed = self.validation_errors_count - errors_before
+                                logger.warning(f"[{region_key}] All {failed} products in batch {batch_number} failed validation")
                         else:
                             logger.warning(f"[{region_key}] API returned status {resp.status_code} for batch {batch_number}")
                             batch.success = False
@@ -606,6 +801,114 @@ class VTEXScraper(BaseScraper):
         self.consolidate_batches(batches_dir, final_file)
         self.validate_run(region_key, final_file)
 
+    async def _scrape_by_ids_async(self, region_key: str, product_ids: list[str]):
+        """
+        Concurrent version of _scrape_by_ids (config: use_async=true).
+
+        Batches are fetched over one pooled aiohttp session with up to
+        max_concurrent_requests in flight, so network latency overlaps
+        instead of adding up batch after batch. The global rate limiter
+        still gates every request.
+        """
+        cfg = self.regions[region_key]
+        logger.info(
+            f"[{self.store_name}/{region_key}] Scraping {len(product_ids)} products "
+            f"(CEP={cfg['cep']}, SC={cfg['sc']}) [ASYNC x{self.max_concurrent_requests}]"
+        )
+
+        cookie = self.resolver.get_segment_cookie(cfg["cep"], cfg["sc"], cfg.get("hub_id"))
+        if not cookie:
+            logger.error(f"Failed to build cookie for {region_key}")
+            return
+
+        base_path = self.get_output_path(region_key)
+        batches_dir = base_path / "batches"
+        batches_dir.mkdir(parents=True, exist_ok=True)
+        final_file = base_path / f"{self.store_name}_{region_key}_full.parquet"
+        api_url = f"{self.base_url}/api/catalog_system/pub/products/search"
+
+        # Use per-store database for parallel execution
+        metrics = get_metrics_collector(
+            db_path="data/metrics/{store}_runs.duckdb",
+            store_name=self.store_name
+        )
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrent_requests,
+            limit_per_host=self.max_concurrent_requests,
+            ttl_dns_cache=300
+        )
+        timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=dict(self.session.headers),
+            cookies={"vtex_segment": cookie},
+        ) as session:
+            tasks = []
+            for i in range(0, len(product_ids), self.batch_size):
+                chunk = product_ids[i : i + self.batch_size]
+                batch_number = i // self.batch_size
+                params = {
+                    "fq": ",".join(f"productId:{pid}" for pid in chunk),
+                    "_from": 0,
+                    "_to": len(chunk) - 1,
+                    "sc": cfg["sc"],
+                }
+                tasks.append(
+                    self._fetch_batch_async(
+                        session, semaphore, api_url, params, batch_number,
+                        batches_dir / f"batch_{batch_number:05d}.parquet",
+                        region_key, metrics,
+                    )
+                )
+            await asyncio.gather(*tasks)
+
+        self.consolidate_batches(batches_dir, final_file)
+        self.validate_run(region_key, final_file)
+
+    async def _fetch_batch_async(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        api_url: str,
+        params: dict,
+        batch_number: int,
+        batch_file: Path,
+        region_key: str,
+        metrics: Any,
+    ):
+        """Fetch, validate and save one product batch (see _scrape_by_ids_async)."""
+        async with semaphore:
+            with metrics.track_batch(batch_number, region=region_key) as batch:
+                try:
+                    # RateLimiter.acquire() blocks, so wait for it off the loop
+                    await asyncio.to_thread(self.rate_limiter.acquire)
+                    try:
+                        async with session.get(api_url, params=params) as resp:
+                            batch.api_status_code = resp.status
+                            body = await resp.read()
+                    finally:
+                        self.rate_limiter.release()
+
+                    if resp.status in [200, 206]:
+                        # Validation and the Parquet write are CPU/disk bound:
+                        # run them off the loop so other fetches keep going
+                        validated_items = await asyncio.to_thread(self.validate_products, body)
+                        batch.products_count = len(validated_items)
+                        if validated_items:
+                            await asyncio.to_thread(
+                                self.save_batch, validated_items, batch_file, region_key
+                            )
+                    else:
+                        logger.warning(f"[{region_key}] API returned status {resp.status} for batch {batch_number}")
+                        batch.success = False
+                except Exception as e:
+                    logger.error(f"Batch {batch_number} error: {e}")
+                    batch.success = False
+
     def _scrape_by_departments(self, region_key: str, limit: Optional[int] = None):
         """Per-region mode: iterate departments and fetch all products (Giassi-style)."""
         cfg = self.regions[region_key]
@@ -654,12 +957,9 @@ class VTEXScraper(BaseScraper):
                         if resp.status_code not in [200, 206]:
                             batch.success = False
                             break
-                        items = resp.json()
-                        if not items:
-                            break
-
                         # Phase 2: Validate products before saving
-                        validated_items = self.validate_products(items)
+                        # (an empty page validates to [] and ends the department)
+                        validated_items = self.validate_products(resp.content)
                         batch.products_count = len(validated_items)
                         if not validated_items:
                             break
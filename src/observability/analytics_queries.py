@@ -58,7 +58,7 @@ def get_discovery_performance(days: int = 7) -> pd.DataFrame:
                 AVG(products_discovered / NULLIF(discovery_duration_seconds, 0))
                     as avg_products_per_second
             FROM scraper_runs
-            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL ? DAY
+            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
               AND discovery_duration_seconds IS NOT NULL
             GROUP BY store, discovery_mode
             ORDER BY avg_discovery_duration DESC
@@ -95,7 +95,7 @@ def get_discovery_trend(store: str = None, days: int = 30) -> pd.DataFrame:
                 AVG(products_discovered) as avg_products_discovered,
                 COUNT(*) as runs_count
             FROM scraper_runs
-            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL ? DAY
+            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
               AND discovery_duration_seconds IS NOT NULL
               {where_clause}
             GROUP BY DATE_TRUNC('day', started_at), store
@@ -120,7 +120,7 @@ def get_batch_performance_by_region(days: int = 7) -> pd.DataFrame:
     with _get_conn() as conn:
         return conn.execute("""
             SELECT
-                region,
+                scraper_batches.region,
                 COUNT(*) as total_batches,
                 AVG(response_time_ms) as avg_response_time_ms,
                 PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY response_time_ms)
@@ -132,9 +132,9 @@ def get_batch_performance_by_region(days: int = 7) -> pd.DataFrame:
                     as error_rate
             FROM scraper_batches
             JOIN scraper_runs ON scraper_batches.run_id = scraper_runs.run_id
-            WHERE scraper_runs.started_at > CURRENT_TIMESTAMP - INTERVAL ? DAY
-              AND region IS NOT NULL
-            GROUP BY region
+            WHERE scraper_runs.started_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
+              AND scraper_batches.region IS NOT NULL
+            GROUP BY scraper_batches.region
             ORDER BY p95_response_time_ms DESC
         """, [days]).fetchdf()
 
@@ -166,7 +166,7 @@ def get_slowest_batches(days: int = 7, limit: int = 20) -> pd.DataFrame:
                 scraper_batches.started_at
             FROM scraper_batches
             JOIN scraper_runs ON scraper_batches.run_id = scraper_runs.run_id
-            WHERE scraper_runs.started_at > CURRENT_TIMESTAMP - INTERVAL ? DAY
+            WHERE scraper_runs.started_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
               AND scraper_batches.response_time_ms IS NOT NULL
             ORDER BY scraper_batches.response_time_ms DESC
             LIMIT ?
@@ -202,7 +202,7 @@ def get_run_performance_summary(days: int = 7) -> pd.DataFrame:
                 AVG(products_scraped / NULLIF(duration_seconds, 0))
                     as avg_products_per_second_overall
             FROM scraper_runs
-            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL ? DAY
+            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL (?) DAY
               AND status IN ('success', 'failed')
             GROUP BY store
             ORDER BY avg_total_duration DESC
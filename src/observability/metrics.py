@@ -173,13 +173,14 @@ class MetricsCollector:
 
         duration = time.time() - self.run_start_time if self.run_start_time else None
 
+        # products_discovered=None keeps the count recorded by finish_discovery()
         with _db_lock:
             with duckdb.connect(str(self.db_path)) as conn:
                 conn.execute("""
                     UPDATE scraper_runs
                     SET finished_at = ?,
                         status = ?,
-                        products_discovered = ?,
+                        products_discovered = COALESCE(?, products_discovered),
                         products_scraped = ?,
                         duration_seconds = ?,
                         output_path = ?,
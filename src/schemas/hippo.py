@@ -8,7 +8,7 @@ Usage:
     from src.schemas.hippo import HippoProduct
 
     try:
-        product = HippoProduct.parse_obj(normalized_data)
+        product = HippoProduct.model_validate(normalized_data)
     except ValidationError as e:
         logger.error("Invalid product schema", error=str(e))
         metrics.increment("validation_errors")
@@ -8,7 +8,7 @@ Usage:
     from src.schemas.superkoch import SuperKochProduct
 
     try:
-        product = SuperKochProduct.parse_obj(normalized_data)
+        product = SuperKochProduct.model_validate(normalized_data)
     except ValidationError as e:
         logger.error("Invalid product schema", error=str(e))
         metrics.increment("validation_errors")
@@ -8,35 +8,75 @@ Usage:
     from src.schemas.vtex import VTEXProduct
 
     try:
-        product = VTEXProduct.parse_obj(api_response)
+        product = VTEXProduct.model_validate(api_response)
     except ValidationError as e:
         logger.error("Invalid product schema", error=str(e))
         metrics.increment("validation_errors")
 """
 
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, field_validator, model_validator
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Annotated, Optional, List, Dict, Any
+import pydantic_core
+from typing_extensions import NotRequired, TypedDict
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, field_validator, model_validator
 from datetime import datetime
 
 
-class VTEXImage(BaseModel):
+class _NonDigitDeleter(dict):
+    """str.translate table that drops every non-digit code point.
+
+    Filled lazily: each code point is classified once, on first sight,
+    instead of materialising a 1.1M-entry table at import.
+    """
+
+    def __missing__(self, code_point: int) -> int | None:
+        kept = code_point if chr(code_point).isdigit() else None
+        self[code_point] = kept
+        return kept
+
+
+_NON_DIGIT_DELETER = _NonDigitDeleter()
+
+
+def _https_url(v: str) -> str:
+    """Ensure a URL is not empty and upgrade plain HTTP to HTTPS."""
+    if not v or not v.strip():
+        raise ValueError("imageUrl cannot be empty")
+    # Ensure HTTPS for security
+    if v.startswith("http://"):
+        v = "https://" + v[7:]
+    return v
+
+
+def _not_empty(v: str) -> str:
+    """Ensure category fields are not empty."""
+    if not v or not v.strip():
+        raise ValueError("Category id/name cannot be empty")
+    return v
+
+
+# Leaf shapes that only ever appear nested inside VTEXProduct are TypedDicts:
+# pydantic-core validates them inline as plain dicts instead of building a
+# model instance (with its own __dict__/fields-set) per image and per offer.
+# Use TypeAdapter(VTEXOffer) etc. to validate one on its own.
+
+class _VTEXImageFields(TypedDict):
     """Product image metadata."""
     imageId: str
-    imageLabel: Optional[str] = None
-    imageTag: Optional[str] = None
-    imageUrl: str
-    imageText: Optional[str] = None
+    imageLabel: NotRequired[Optional[str]]
+    imageTag: NotRequired[Optional[str]]
+    imageUrl: Annotated[str, AfterValidator(_https_url)]
+    imageText: NotRequired[Optional[str]]
 
-    @field_validator('imageUrl')
-    @classmethod
-    def validate_image_url(cls, v):
-        """Ensure image URL is valid and not empty."""
-        if not v or not v.strip():
-            raise ValueError("imageUrl cannot be empty")
-        # Ensure HTTPS for security
-        if v.startswith("http://"):
-            v = v.replace("http://", "https://", 1)
-        return v
+
+def _complete_image(image: Dict[str, Any]) -> Dict[str, Any]:
+    """Emit every image key, as the BaseModel version did (None when omitted)."""
+    return {key: image.get(key) for key in _VTEXImageFields.__annotations__}
+
+
+VTEXImage = Annotated[_VTEXImageFields, AfterValidator(_complete_image)]
 
 
 class VTEXPromotion(BaseModel):
@@ -50,54 +90,65 @@ class VTEXPromotion(BaseModel):
     endDate: Optional[str] = None
     conditions: Optional[Dict[str, Any]] = None
 
-    class Config:
-        extra = "allow"
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="allow")
 
 
-class VTEXOffer(BaseModel):
+class _VTEXOfferFields(TypedDict):
     """Commercial offer from a seller."""
-    Price: float = Field(gt=0, description="Current price (must be > 0)")
-    ListPrice: Optional[float] = Field(None, ge=0, description="Original list price")
-    PriceWithoutDiscount: Optional[float] = Field(None, ge=0)
-    RewardValue: Optional[float] = Field(None, ge=0)
-    PriceValidUntil: Optional[str] = None
-    AvailableQuantity: int = Field(ge=0, description="Stock quantity")
-    Tax: Optional[float] = Field(None, ge=0)
-    CacheVersionUsedToCallCheckout: Optional[str] = None
+    Price: Annotated[float, Field(gt=0, description="Current price (must be > 0)")]
+    ListPrice: NotRequired[Optional[Annotated[float, Field(ge=0, description="Original list price")]]]
+    PriceWithoutDiscount: NotRequired[Optional[Annotated[float, Field(ge=0)]]]
+    RewardValue: NotRequired[Optional[Annotated[float, Field(ge=0)]]]
+    PriceValidUntil: NotRequired[Optional[str]]
+    AvailableQuantity: Annotated[int, Field(ge=0, description="Stock quantity")]
+    Tax: NotRequired[Optional[Annotated[float, Field(ge=0)]]]
+    CacheVersionUsedToCallCheckout: NotRequired[Optional[str]]
 
     # NEW: Promotions applied to this offer
-    Promotions: Optional[List[VTEXPromotion]] = Field(default_factory=list)
+    Promotions: NotRequired[Optional[List[VTEXPromotion]]]
 
     # NEW: Delivery and availability metadata
-    DeliverySlaSameDayEnabled: Optional[bool] = None
-    EstimatedDateArrival: Optional[str] = None
+    DeliverySlaSameDayEnabled: NotRequired[Optional[bool]]
+    EstimatedDateArrival: NotRequired[Optional[str]]
 
-    @model_validator(mode='after')
-    def validate_offer(self):
-        """Cross-field validation for offer consistency."""
-        # Ensure ListPrice >= Price
-        if self.ListPrice is not None and self.Price is not None:
-            if self.ListPrice < self.Price:
-                raise ValueError(
-                    f"ListPrice ({self.ListPrice}) cannot be less than Price ({self.Price})"
-                )
 
-        # If ListPrice is missing, default to Price (no discount)
-        if self.ListPrice is None and self.Price is not None:
-            self.ListPrice = self.Price
+def _validate_offer(offer: Dict[str, Any]) -> Dict[str, Any]:
+    """Cross-field validation for offer consistency."""
+    # Emit every declared key in declaration order, as the BaseModel version
+    # did, so bronze Parquet keeps the same commertialOffer struct
+    offer = {key: offer.get(key) for key in _VTEXOfferFields.__annotations__}
+    if offer["Promotions"] is None:
+        offer["Promotions"] = []
+    price = offer["Price"]
 
-        # If PriceWithoutDiscount exists, it should be >= Price
-        if self.PriceWithoutDiscount is not None and self.Price is not None:
-            if self.PriceWithoutDiscount < self.Price:
-                raise ValueError(
-                    f"PriceWithoutDiscount ({self.PriceWithoutDiscount}) cannot be less than Price ({self.Price})"
-                )
+    # Ensure ListPrice >= Price
+    list_price = offer["ListPrice"]
+    if list_price is not None and list_price < price:
+        raise ValueError(
+            f"ListPrice ({list_price}) cannot be less than Price ({price})"
+        )
 
-        return self
+    # If ListPrice is missing, default to Price (no discount)
+    if list_price is None:
+        offer["ListPrice"] = price
+
+    # If PriceWithoutDiscount exists, it should be >= Price
+    without_discount = offer["PriceWithoutDiscount"]
+    if without_discount is not None and without_discount < price:
+        raise ValueError(
+            f"PriceWithoutDiscount ({without_discount}) cannot be less than Price ({price})"
+        )
+
+    return offer
+
+
+VTEXOffer = Annotated[_VTEXOfferFields, AfterValidator(_validate_offer)]
 
 
 class VTEXSeller(BaseModel):
     """Seller information and commercial offer."""
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="ignore")
+
     sellerId: str
     sellerName: str
     addToCartLink: Optional[str] = None
@@ -115,6 +166,8 @@ class VTEXSeller(BaseModel):
 
 class VTEXItem(BaseModel):
     """SKU/Item within a product."""
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="ignore")
+
     itemId: str
     name: str
     nameComplete: Optional[str] = None
@@ -141,7 +194,7 @@ class VTEXItem(BaseModel):
         """Validate EAN format (if present)."""
         if v is not None and v.strip():
             # Remove non-digit characters
-            cleaned_ean = ''.join(filter(str.isdigit, v))
+            cleaned_ean = v.translate(_NON_DIGIT_DELETER)
             # EAN should be 8, 13, or 14 digits (EAN-8, EAN-13, GTIN-14)
             if len(cleaned_ean) not in (8, 13, 14):
                 # Don't fail validation, just log warning and return original
@@ -159,18 +212,10 @@ class VTEXItem(BaseModel):
         return v
 
 
-class VTEXCategory(BaseModel):
+class VTEXCategory(TypedDict):
     """Product category information."""
-    id: str
-    name: str
-
-    @field_validator('id', 'name')
-    @classmethod
-    def validate_not_empty(cls, v):
-        """Ensure category fields are not empty."""
-        if not v or not v.strip():
-            raise ValueError("Category id/name cannot be empty")
-        return v
+    id: Annotated[str, AfterValidator(_not_empty)]
+    name: Annotated[str, AfterValidator(_not_empty)]
 
 
 class VTEXProduct(BaseModel):
@@ -240,7 +285,7 @@ class VTEXProduct(BaseModel):
             raise ValueError("link cannot be empty")
         # Ensure HTTPS
         if v.startswith("http://"):
-            v = v.replace("http://", "https://", 1)
+            v = "https://" + v[7:]
         return v
 
     @field_validator('items')
@@ -264,12 +309,14 @@ class VTEXProduct(BaseModel):
 
         return self
 
-    class Config:
-        """Pydantic config."""
-        # Allow extra fields from API (forward compatibility)
-        extra = "allow"
-        # Use enum values
-        use_enum_values = True
+    model_config = ConfigDict(
+        defer_build=True,
+        frozen=True,
+        # Allow extra fields from API (forward compatibility): bronze keeps
+        # the dynamic specification fields VTEX adds per store
+        extra="allow",
+        use_enum_values=True,
+    )
 
 
 # Lightweight schema for category tree discovery
@@ -289,11 +336,62 @@ class VTEXCategoryTree(BaseModel):
             raise ValueError(f"Category ID must be positive, got {v}")
         return v
 
-    class Config:
-        """Pydantic config."""
-        # Allow extra fields
-        extra = "allow"
+    model_config = ConfigDict(defer_build=True, frozen=True, extra="allow")
+
+
+# Validators pickled by scripts/setup/precompile_schemas.py. The cache is only
+# trusted when it was built from this exact source and pydantic-core version.
+SCHEMA_CACHE_PATH = Path(__file__).with_name("_vtex_cache.pkl")
+_CACHED_MODELS = (VTEXProduct, VTEXCategoryTree)
+
 
+def schema_cache_key() -> str:
+    """Fingerprint of this module's source and the installed pydantic-core."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(pydantic_core.__version__.encode())
+    return digest.hexdigest()
 
-# Enable forward references for recursive models
-VTEXCategoryTree.update_forward_refs()
+
+def dump_schema_cache() -> bytes:
+    """Serialize the built core schema, validator and serializer of each entry model."""
+    return pickle.dumps(
+        {
+            "key": schema_cache_key(),
+            "models": {
+                model.__name__: (
+                    model.__pydantic_core_schema__,
+                    model.__pydantic_validator__,
+                    model.__pydantic_serializer__,
+                )
+                for model in _CACHED_MODELS
+            },
+        },
+        protocol=5,
+    )
+
+
+def _load_schema_cache() -> bool:
+    """Install cached validators on the entry models; False if missing or stale."""
+    try:
+        cache = pickle.loads(SCHEMA_CACHE_PATH.read_bytes())
+        if cache["key"] != schema_cache_key():
+            return False
+        built = {model: cache["models"][model.__name__] for model in _CACHED_MODELS}
+    except Exception:
+        return False
+
+    for model, (core_schema, validator, serializer) in built.items():
+        model.__pydantic_core_schema__ = core_schema
+        model.__pydantic_validator__ = validator
+        model.__pydantic_serializer__ = serializer
+        model.__pydantic_complete__ = True
+    return True
+
+
+# Nested models stay deferred (their schemas are inlined into the parents);
+# build the entry points now so the first scrape doesn't pay for it, from the
+# precompiled cache when there is a valid one.
+# model_rebuild() also resolves the recursive VTEXCategoryTree reference.
+if not _load_schema_cache():
+    VTEXProduct.model_rebuild()
+    VTEXCategoryTree.model_rebuild()
@@ -19,11 +19,10 @@ import duckdb
 
 @pytest.fixture
 def temp_db():
-    """Create a temporary DuckDB for testing."""
-    with tempfile.NamedTemporaryFile(suffix=".duckdb", delete=False) as f:
-        db_path = f.name
-    yield db_path
-    Path(db_path).unlink(missing_ok=True)
+    """Create a temporary DuckDB path for testing."""
+    # DuckDB refuses to open a pre-created empty file, so only hand out a path
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield str(Path(tmpdir) / "test.duckdb")
 
 
 @pytest.fixture
@@ -134,6 +133,7 @@ def mock_requests_session():
     response = Mock()
     response.status_code = 200
     response.json.return_value = []
+    response.content = b"[]"
 
     session.get.return_value = response
     session.cookies = MagicMock()
@@ -236,6 +236,66 @@ def sample_products_batch():
     ]
 
 
+# ─────────────────────────────────────────────────────────────────────
+# Schema Fixtures (session-scoped: built once, treat as read-only)
+# ─────────────────────────────────────────────────────────────────────
+
+@pytest.fixture(scope="session", autouse=True)
+def build_vtex_schemas():
+    """Build the VTEX validators once per session instead of on first use."""
+    from src.schemas.vtex import VTEXProduct, VTEXCategoryTree
+    VTEXProduct.model_rebuild()
+    VTEXCategoryTree.model_rebuild()
+
+
+@pytest.fixture(scope="session")
+def valid_offer_data():
+    """Minimal valid commertialOffer."""
+    return {
+        "Price": 10.50,
+        "AvailableQuantity": 100,
+    }
+
+
+@pytest.fixture(scope="session")
+def valid_seller_data(valid_offer_data):
+    """Minimal valid seller."""
+    return {
+        "sellerId": "1",
+        "sellerName": "Test Seller",
+        "commertialOffer": valid_offer_data,
+    }
+
+
+@pytest.fixture(scope="session")
+def valid_item_data(valid_seller_data):
+    """Minimal valid item (SKU). Override fields with {**valid_item_data, ...}."""
+    return {
+        "itemId": "123",
+        "name": "Test Product SKU",
+        "sellers": [valid_seller_data],
+    }
+
+
+@pytest.fixture(scope="session")
+def valid_product_data(valid_item_data):
+    """Minimal valid product. Override fields with {**valid_product_data, ...}."""
+    return {
+        "productId": "1",
+        "productName": "Test Product",
+        "linkText": "test-product",
+        "link": "https://example.com/test-product",
+        "items": [valid_item_data],
+    }
+
+
+@pytest.fixture(scope="session")
+def valid_product_model(valid_product_data):
+    """VTEXProduct validated from valid_product_data."""
+    from src.schemas.vtex import VTEXProduct
+    return VTEXProduct.model_validate(valid_product_data)
+
+
 # ─────────────────────────────────────────────────────────────────────
 # Cleanup
 # ─────────────────────────────────────────────────────────────────────
@@ -0,0 +1,366 @@
+"""
+Integration tests for scripts/convert_jsonl_to_parquet.py.
+
+Tests:
+- Converted files match write_parquet (columns, types, values)
+- Schema drift between blocks
+- Malformed lines and files with no valid records
+- --delete-jsonl and --schema
+- scan_and_convert: exclusions, already-converted files, in-process and pooled files
+"""
+
+import json
+import sys
+import pytest
+import pyarrow as pa
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from scripts import convert_jsonl_to_parquet as converter
+from scripts.convert_jsonl_to_parquet import convert_jsonl_to_parquet
+from src.ingest.loaders.parquet_writer import write_parquet
+
+
+def write_jsonl(path: Path, records: list) -> Path:
+    """Write records as one JSON object per line."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+@pytest.fixture
+def bronze_records():
+    """VTEX-like records as scraper runs stored them in JSONL."""
+    return [
+        {
+            "productId": str(i),
+            "productName": f"Produto {i}",
+            "brand": "Marca" if i % 2 else None,
+            "releaseDate": "2024-01-01T00:00:00Z",
+            "items": [
+                {
+                    "itemId": f"{i}0",
+                    "sellers": [
+                        {
+                            "sellerId": "1",
+                            "commertialOffer": {
+                                "Price": 1.5 + i,
+                                "AvailableQuantity": i,
+                                "PriceValidUntil": "2025-06-30T23:59:59Z",
+                            },
+                        }
+                    ],
+                }
+            ],
+            "specs": {},
+            "_metadata": {"supermarket": "bistek", "region": "florianopolis_costeira"},
+        }
+        for i in range(20)
+    ]
+
+
+class TestConvertMatchesWriteParquet:
+    """Converted JSONL must come out as the scrapers write Parquet."""
+
+    def test_same_table_as_write_parquet(self, bronze_records, temp_dir):
+        """Test converter output equals write_parquet output for the same records."""
+        jsonl_path = write_jsonl(temp_dir / "run" / "bistek.jsonl", bronze_records)
+        expected_path = temp_dir / "expected.parquet"
+        write_parquet(json.loads(json.dumps(bronze_records)), expected_path)
+
+        assert convert_jsonl_to_parquet(jsonl_path) == len(bronze_records)
+
+        converted = pq.read_table(jsonl_path.with_suffix(".parquet"))
+        expected = pq.read_table(expected_path)
+        assert converted.schema.equals(expected.schema)
+        assert converted.to_pylist() == expected.to_pylist()
+
+    def test_duckdb_backend_same_columns_and_values(self, bronze_records, temp_dir):
+        """Test the DuckDB backend drops empty objects and keeps strings like write_parquet."""
+        jsonl_path = write_jsonl(temp_dir / "run" / "bistek.jsonl", bronze_records)
+        expected_path = temp_dir / "expected.parquet"
+        write_parquet(json.loads(json.dumps(bronze_records)), expected_path)
+
+        assert convert_jsonl_to_parquet(jsonl_path, backend="duckdb") == len(bronze_records)
+
+        converted = pq.read_table(jsonl_path.with_suffix(".parquet"))
+        expected = pq.read_table(expected_path)
+        assert converted.column_names == expected.column_names
+        assert converted.to_pylist() == expected.to_pylist()
+
+    def test_duckdb_backend_leaves_empty_objects_in_lists_to_arrow(self, temp_dir):
+        """Test files with {} inside list items go through the Arrow path."""
+        records = [{"productId": "1", "items": [{"itemId": "10", "specs": {}}]}]
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", records)
+
+        assert converter._duckdb_jsonl_to_parquet(jsonl_path, temp_dir / "out.parquet", "zstd", 3) is None
+        assert convert_jsonl_to_parquet(jsonl_path, backend="duckdb") == 1
+        table = pq.read_table(jsonl_path.with_suffix(".parquet"))
+        assert table.column("items").to_pylist() == [[{"itemId": "10"}]]
+
+    def test_iso_strings_stay_strings(self, bronze_records, temp_dir):
+        """Test ISO 8601 fields are not turned into timestamps (the "Z" is kept)."""
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", bronze_records)
+
+        convert_jsonl_to_parquet(jsonl_path)
+
+        table = pq.read_table(jsonl_path.with_suffix(".parquet"))
+        assert table.column("releaseDate").to_pylist()[0] == "2024-01-01T00:00:00Z"
+        offer = table.column("items").to_pylist()[0][0]["sellers"][0]["commertialOffer"]
+        assert offer["PriceValidUntil"] == "2025-06-30T23:59:59Z"
+
+
+class TestSchemaDrift:
+    """Types that change after the first block must not load the whole file."""
+
+    @pytest.fixture
+    def small_blocks(self, monkeypatch):
+        """Parse in 4 KB blocks so a small file spans several of them."""
+        monkeypatch.setattr(converter, "_READ_OPTIONS", pajson.ReadOptions(block_size=4096))
+
+    def test_drift_is_streamed_with_widened_schema(self, small_blocks, mocker, temp_dir):
+        """Test null-then-number and late nested keys are streamed, not read line by line."""
+        records = [{"productId": str(i), "discount": None, "offer": {"Price": i}} for i in range(500)]
+        records += [{"productId": "late", "discount": 0.5, "offer": {"Price": 1.5, "Tax": 0.1}}]
+        jsonl_path = write_jsonl(temp_dir / "drift.jsonl", records)
+        stream = mocker.spy(converter, "_stream_jsonl_to_parquet")
+        line_by_line = mocker.spy(converter, "_read_jsonl_records")
+
+        assert convert_jsonl_to_parquet(jsonl_path) == 501
+
+        table = pq.read_table(jsonl_path.with_suffix(".parquet"))
+        assert table.schema.field("discount").type == pa.float64()
+        assert table.schema.field("offer_Price").type == pa.float64()
+        assert table.column("offer_Tax").to_pylist()[-1] == 0.1
+        # First attempt fails on the drift, the retry streams with the widened schema
+        assert stream.call_count == 2
+        assert line_by_line.call_count == 0
+
+    def test_widened_schema_is_none_for_conflicting_types(self, small_blocks, temp_dir):
+        """Test a number in one block and a string in another cannot be widened."""
+        records = [{"productId": i} for i in range(500)] + [{"productId": "abc"}]
+        jsonl_path = write_jsonl(temp_dir / "conflict.jsonl", records)
+
+        assert converter._widened_schema(jsonl_path) is None
+
+
+class TestMalformedLines:
+    """Bad lines are skipped, the rest of the file is converted."""
+
+    @pytest.fixture
+    def malformed_jsonl(self, temp_dir):
+        """Two valid records around a truncated line, plus a trailing blank line."""
+        path = temp_dir / "bistek.jsonl"
+        path.write_text('{"productId": "1"}\n{"productId": \n{"productId": "2"}\n\n', encoding="utf-8")
+        return path
+
+    @pytest.mark.parametrize("backend", ["arrow", "duckdb"])
+    def test_malformed_line_is_skipped(self, backend, malformed_jsonl, mocker):
+        """Test both backends fall back to line-by-line decoding and keep the valid records."""
+        line_by_line = mocker.spy(converter, "_read_jsonl_records")
+
+        assert convert_jsonl_to_parquet(malformed_jsonl, backend=backend) == 2
+
+        table = pq.read_table(malformed_jsonl.with_suffix(".parquet"))
+        assert table.column("productId").to_pylist() == ["1", "2"]
+        assert line_by_line.call_count == 1
+
+    def test_no_valid_records_writes_nothing(self, temp_dir):
+        """Test a file with only bad or blank lines returns 0 and leaves no Parquet."""
+        jsonl_path = temp_dir / "bistek.jsonl"
+        jsonl_path.write_text("not json\n\n", encoding="utf-8")
+
+        assert convert_jsonl_to_parquet(jsonl_path, delete_jsonl=True) == 0
+
+        assert not jsonl_path.with_suffix(".parquet").exists()
+        assert not jsonl_path.with_suffix(".parquet.tmp").exists()
+        assert jsonl_path.exists()
+
+    def test_conflicting_types_raise_without_partial_file(self, temp_dir):
+        """Test a number and a string in the same field fail and leave no .parquet(.tmp)."""
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", [{"productId": 1}, {"productId": "abc"}])
+
+        with pytest.raises(pa.ArrowInvalid):
+            convert_jsonl_to_parquet(jsonl_path, delete_jsonl=True)
+
+        assert not jsonl_path.with_suffix(".parquet").exists()
+        assert not jsonl_path.with_suffix(".parquet.tmp").exists()
+        assert jsonl_path.exists()
+
+
+class TestDeleteJsonl:
+    """--delete-jsonl removes a JSONL only once its Parquet is in place."""
+
+    def test_deleted_after_conversion(self, bronze_records, temp_dir):
+        """Test the JSONL is deleted and the Parquet kept."""
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", bronze_records)
+
+        convert_jsonl_to_parquet(jsonl_path, delete_jsonl=True)
+
+        assert not jsonl_path.exists()
+        assert pq.read_metadata(jsonl_path.with_suffix(".parquet")).num_rows == len(bronze_records)
+
+    def test_kept_by_default(self, bronze_records, temp_dir):
+        """Test the JSONL stays without delete_jsonl."""
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", bronze_records)
+
+        convert_jsonl_to_parquet(jsonl_path)
+
+        assert jsonl_path.exists()
+
+    def test_kept_when_no_columns_remain(self, temp_dir):
+        """Test records made only of empty objects fail and the JSONL is kept."""
+        jsonl_path = write_jsonl(temp_dir / "bistek.jsonl", [{"specs": {}}, {"specs": {}}])
+
+        with pytest.raises(ValueError, match="no columns"):
+            convert_jsonl_to_parquet(jsonl_path, delete_jsonl=True)
+
+        assert jsonl_path.exists()
+        assert not jsonl_path.with_suffix(".parquet").exists()
+
+
+class TestSchemaOption:
+    """--schema pins field types for the arrow backend."""
+
+    def write_schema(self, path: Path, description) -> Path:
+        """Write a --schema file."""
+        path.write_text(json.dumps(description), encoding="utf-8")
+        return path
+
+    def test_load_schema_nested_types(self, temp_dir):
+        """Test type names, objects and one-item lists map to Arrow types."""
+        schema_path = self.write_schema(temp_dir / "schema.json", {
+            "productId": "string",
+            "items": [{"itemId": "string", "Price": "double"}],
+            "_metadata": {"region": "string"},
+        })
+
+        schema = converter.load_schema(schema_path)
+
+        assert schema.field("productId").type == pa.string()
+        assert schema.field("items").type == pa.list_(
+            pa.struct([("itemId", pa.string()), ("Price", pa.float64())])
+        )
+        assert schema.field("_metadata").type == pa.struct([("region", pa.string())])
+
+    @pytest.mark.parametrize("description", [
+        ["productId", "string"],
+        {"items": ["string", "int64"]},
+        {"productId": 1},
+        {"productId": "not_a_type"},
+    ])
+    def test_load_schema_rejects_invalid_descriptions(self, description, temp_dir):
+        """Test a non-object top level, multi-item lists, non-string leaves and unknown types."""
+        schema_path = self.write_schema(temp_dir / "schema.json", description)
+
+        with pytest.raises(ValueError):
+            converter.load_schema(schema_path)
+
+    def test_schema_pins_given_fields(self, temp_dir):
+        """Test given fields keep their type and the other fields are inferred."""
+        jsonl_path = write_jsonl(
+            temp_dir / "bistek.jsonl", [{"productId": "1", "Price": 9, "offer": {"Tax": 1}}]
+        )
+
+        convert_jsonl_to_parquet(jsonl_path, schema=pa.schema([("Price", pa.float64())]))
+
+        schema = pq.read_schema(jsonl_path.with_suffix(".parquet"))
+        assert schema.field("Price").type == pa.float64()
+        assert schema.field("offer_Tax").type == pa.int64()
+        assert schema.field("productId").type == pa.string()
+
+    def test_main_exits_on_invalid_schema(self, temp_dir, monkeypatch):
+        """Test main() exits with status 1 before converting anything."""
+        jsonl_path = write_jsonl(temp_dir / "bronze" / "bistek.jsonl", [{"productId": "1"}])
+        schema_path = self.write_schema(temp_dir / "schema.json", ["productId"])
+        monkeypatch.setattr(sys, "argv", [
+            "convert_jsonl_to_parquet.py",
+            "--bronze-dir", str(temp_dir / "bronze"),
+            "--schema", str(schema_path),
+        ])
+
+        with pytest.raises(SystemExit) as exc_info:
+            converter.main()
+
+        assert exc_info.value.code == 1
+        assert not jsonl_path.with_suffix(".parquet").exists()
+
+
+class TestScanAndConvert:
+    """Whole bronze trees: which files are converted and where."""
+
+    @pytest.fixture
+    def bronze_dir(self, bronze_records, temp_dir):
+        """Two stores with one run each, a batches/ file and an already-converted run."""
+        root = temp_dir / "bronze"
+        for store in ("bistek", "giassi"):
+            write_jsonl(
+                root / f"supermarket={store}" / "region=a" / "year=2024" / "run_1.jsonl",
+                bronze_records,
+            )
+        write_jsonl(root / "supermarket=bistek" / "batches" / "batch_1.jsonl", bronze_records)
+        done = write_jsonl(root / "supermarket=giassi" / "region=a" / "year=2024" / "run_0.jsonl", bronze_records)
+        write_parquet(json.loads(json.dumps(bronze_records)), done.with_suffix(".parquet"))
+        return root
+
+    def converted(self, bronze_dir: Path) -> list:
+        """Converted run files, relative to bronze_dir."""
+        return sorted(p.relative_to(bronze_dir).as_posix() for p in bronze_dir.rglob("run_1.parquet"))
+
+    def test_dry_run_converts_nothing(self, bronze_dir):
+        """Test dry run counts files without writing Parquet."""
+        stats = converter.scan_and_convert(bronze_dir, dry_run=True)
+
+        assert stats == {"converted": 0, "skipped": 1, "errors": 0, "records": 0}
+        assert self.converted(bronze_dir) == []
+
+    @pytest.mark.parametrize("backend", ["arrow", "duckdb"])
+    def test_in_process(self, backend, bronze_dir, bronze_records):
+        """Test one worker converts every run, skipping batches/ and converted files."""
+        stats = converter.scan_and_convert(bronze_dir, workers=1, backend=backend)
+
+        assert stats == {"converted": 2, "skipped": 1, "errors": 0, "records": 2 * len(bronze_records)}
+        assert self.converted(bronze_dir) == [
+            "supermarket=bistek/region=a/year=2024/run_1.parquet",
+            "supermarket=giassi/region=a/year=2024/run_1.parquet",
+        ]
+        assert not (bronze_dir / "supermarket=bistek" / "batches" / "batch_1.parquet").exists()
+
+    def test_worker_pool(self, bronze_dir, bronze_records):
+        """Test small files are converted in worker processes, with JSONL deletion."""
+        stats = converter.scan_and_convert(bronze_dir, workers=2, delete_jsonl=True)
+
+        assert stats == {"converted": 2, "skipped": 1, "errors": 0, "records": 2 * len(bronze_records)}
+        assert len(self.converted(bronze_dir)) == 2
+        assert not list(bronze_dir.rglob("run_1.jsonl"))
+
+    def test_large_files_stay_in_process(self, bronze_dir, monkeypatch):
+        """Test files above PARALLEL_PARSE_MIN_SIZE never reach the worker pool."""
+        monkeypatch.setattr(converter, "PARALLEL_PARSE_MIN_SIZE", 0)
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("large files must not be sent to the worker pool")
+
+        monkeypatch.setattr(converter, "ProcessPoolExecutor", no_pool)
+
+        stats = converter.scan_and_convert(bronze_dir, workers=2)
+
+        assert stats["converted"] == 2
+        assert stats["errors"] == 0
+
+    def test_failed_file_is_counted_and_kept(self, bronze_dir):
+        """Test a file that cannot be converted is an error and its JSONL is not deleted."""
+        bad = write_jsonl(
+            bronze_dir / "supermarket=bistek" / "region=b" / "year=2024" / "run_1.jsonl",
+            [{"productId": 1}, {"productId": "abc"}],
+        )
+
+        stats = converter.scan_and_convert(bronze_dir, workers=1, delete_jsonl=True)
+
+        assert stats["errors"] == 1
+        assert stats["converted"] == 2
+        assert bad.exists()
+        assert not bad.with_suffix(".parquet").exists()
@@ -138,6 +138,76 @@ class TestParquetSchemaValidation:
         assert isinstance(df_read["categories"].iloc[0], list)
         assert len(df_read["categories"].iloc[0]) == 2
 
+    def test_write_parquet_flattens_nested_objects(self, temp_dir):
+        """Test write_parquet flattens structs to parent_child columns and drops empty ones."""
+        from src.ingest.loaders.parquet_writer import write_parquet
+
+        items = [
+            {"productId": "1", "price": {"value": 10.5}, "specs": {}, "items": [{"sku": "a"}]},
+            {"productId": "2", "price": {"value": 25.99, "currency": "BRL"}, "items": []},
+        ]
+
+        output_file = temp_dir / "flattened.parquet"
+        count = write_parquet(items, output_file, metadata={"supermarket": "bistek"})
+
+        table = pq.read_table(output_file)
+
+        assert count == 2
+        assert table.column_names == [
+            "productId", "price_value", "price_currency", "items", "_metadata_supermarket"
+        ]
+        assert table.column("price_currency").to_pylist() == [None, "BRL"]
+        assert table.column("items").to_pylist() == [[{"sku": "a"}], []]
+
+    def test_write_parquet_keeps_json_normalize_layout(self, mock_vtex_product, temp_dir):
+        """Test write_parquet schema matches the former json_normalize layout for a VTEX product."""
+        from src.ingest.loaders.parquet_writer import write_parquet
+        from src.schemas.vtex import VTEXProduct
+
+        def drop_empty_objects(obj):
+            if isinstance(obj, dict):
+                return {k: drop_empty_objects(v) for k, v in obj.items() if v != {}}
+            if isinstance(obj, list):
+                return [drop_empty_objects(v) for v in obj]
+            return obj
+
+        def plain_strings(data_type):
+            return pa.string() if pa.types.is_large_string(data_type) else data_type
+
+        products = [
+            dict(mock_vtex_product, brandId=2000001, releaseDate="2024-01-01T00:00:00Z"),
+            dict(mock_vtex_product, productId="300", brandId=None),
+        ]
+        items = [VTEXProduct.model_validate(p).model_dump() for p in products]
+        metadata = {"supermarket": "bistek"}
+
+        # Previous write path: strip empty dicts, json_normalize, from_pandas
+        legacy_items = [
+            drop_empty_objects(dict(item, _metadata=dict(metadata))) for item in items
+        ]
+        legacy = pa.Table.from_pandas(pd.json_normalize(legacy_items, sep="_"), preserve_index=False)
+
+        output_file = temp_dir / "vtex_layout.parquet"
+        assert write_parquet(items, output_file, metadata=metadata) == 2
+        schema = pq.read_schema(output_file)
+
+        assert schema.names == legacy.column_names
+        expected = {f.name: plain_strings(f.type) for f in legacy.schema}
+        # json_normalize turned the nullable integer into float64 (NaN for None)
+        assert expected["brandId"] == pa.float64()
+        expected["brandId"] = pa.int64()
+        assert {f.name: f.type for f in schema} == expected
+
+    def test_write_parquet_rejects_rows_without_columns(self, temp_dir):
+        """Test a batch made only of empty objects raises instead of writing nothing."""
+        from src.ingest.loaders.parquet_writer import write_parquet
+
+        output_file = temp_dir / "empty_objects.parquet"
+
+        with pytest.raises(ValueError, match="no columns"):
+            write_parquet([{"specs": {}}, {"specs": {}}], output_file)
+        assert not output_file.exists()
+
 
 class TestParquetConsolidation:
     """Test consolidating multiple Parquet batches."""
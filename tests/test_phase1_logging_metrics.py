@@ -6,15 +6,18 @@ Tests validate that:
 2. MetricsCollector can track discovery phase separately
 3. Batch tracking includes region parameter
 4. VTEXScraper integrates with metrics properly
-5. Legacy scrapers show deprecation warnings
+5. Legacy scrapers package is removed (code lives in src.ingest.scrapers)
 
 Run with: pytest tests/test_phase1_logging_metrics.py -v
 """
 
+import ast
+import functools
 import pytest
 import duckdb
+import importlib
+import os
 import tempfile
-import warnings
 from pathlib import Path
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
@@ -22,77 +25,140 @@ from unittest.mock import Mock, patch, MagicMock
 from src.observability.metrics import MetricsCollector, get_metrics_collector
 
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
 # ─────────────────────────────────────────────────────────────────────
 # Fixtures
 # ─────────────────────────────────────────────────────────────────────
 
 @pytest.fixture
 def temp_db():
-    """Create a temporary DuckDB for testing."""
-    with tempfile.NamedTemporaryFile(suffix=".duckdb", delete=False) as f:
-        db_path = f.name
-    yield db_path
-    Path(db_path).unlink(missing_ok=True)
+    """Create a temporary DuckDB path for testing."""
+    # DuckDB refuses to open a pre-created empty file, so only hand out a path
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield str(Path(tmpdir) / "test.duckdb")
+
+
+@pytest.fixture(scope="session")
+def shared_db(tmp_path_factory):
+    """
+    Session-wide DuckDB with the metrics schema initialized once.
+
+    Keyed on the pytest-xdist worker id so parallel workers (pytest -n auto)
+    never share a database file. Tests keep rows apart by unique run_ids.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    db_path = tmp_path_factory.mktemp(f"metrics_{worker}") / "runs.duckdb"
+    MetricsCollector(db_path=str(db_path))
+    return str(db_path)
+
+
+@pytest.fixture
+def metrics_collector(shared_db):
+    """Create a fresh MetricsCollector (clean run context) on the shared DB."""
+    return MetricsCollector(db_path=shared_db)
+
+
+@pytest.fixture(scope="session")
+def verify_conn(shared_db):
+    """
+    One read-side connection to the shared DB for the whole session.
+
+    Collector writes in the same process reuse the already-open database
+    instance, so verifications never pay the catalog load of a fresh connect.
+    """
+    conn = duckdb.connect(shared_db)
+    yield conn
+    conn.close()
 
 
 @pytest.fixture
-def metrics_collector(temp_db):
-    """Create a fresh MetricsCollector instance for each test."""
-    return MetricsCollector(db_path=temp_db)
+def db_cursor(verify_conn):
+    """Cheap per-test cursor off the shared verification connection."""
+    cursor = verify_conn.cursor()
+    yield cursor
+    cursor.close()
+
+
+@pytest.fixture(scope="session")
+def schema_cache(verify_conn):
+    """Column names per metrics table, probed once per session."""
+    # Relation metadata comes straight from the catalog: no query, no pandas
+    return {
+        table: set(verify_conn.table(table).columns)
+        for table in ("scraper_runs", "scraper_batches")
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────
-# Schema Tests
+# Query Helpers
 # ─────────────────────────────────────────────────────────────────────
 
-def test_schema_includes_discovery_columns(temp_db):
-    """Verify scraper_runs table has discovery-phase tracking columns."""
-    collector = MetricsCollector(db_path=temp_db)
+# DuckDB's Python client has no prepare(); every verification goes through
+# these two fixed statements instead of re-spelling column lists per test.
+RUN_QUERY = "SELECT * FROM scraper_runs WHERE run_id = ?"
+BATCHES_QUERY = "SELECT * FROM scraper_batches WHERE run_id = ? ORDER BY batch_number"
 
-    with duckdb.connect(temp_db) as conn:
-        # Query schema
-        schema = conn.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = 'scraper_runs'
-        """).fetchdf()
 
-        column_names = schema['column_name'].tolist()
+def fetch_run(conn, run_id: str) -> dict | None:
+    """Return the scraper_runs row for run_id as a column -> value dict."""
+    row = conn.execute(RUN_QUERY, [run_id]).fetchone()
+    if row is None:
+        return None
+    return dict(zip((col[0] for col in conn.description), row))
 
-        # Check for Phase 1 enhancement columns
-        assert 'discovery_started_at' in column_names, \
-            "Missing discovery_started_at column"
-        assert 'discovery_finished_at' in column_names, \
-            "Missing discovery_finished_at column"
-        assert 'discovery_duration_seconds' in column_names, \
-            "Missing discovery_duration_seconds column"
-        assert 'discovery_mode' in column_names, \
-            "Missing discovery_mode column"
 
+def fetch_batches(conn, run_id: str) -> list[dict]:
+    """Return all scraper_batches rows for run_id as column -> value dicts."""
+    rows = conn.execute(BATCHES_QUERY, [run_id]).fetchall()
+    columns = [col[0] for col in conn.description]
+    return [dict(zip(columns, row)) for row in rows]
 
-def test_schema_includes_region_in_batches(temp_db):
-    """Verify scraper_batches table has region column."""
-    collector = MetricsCollector(db_path=temp_db)
 
-    with duckdb.connect(temp_db) as conn:
-        schema = conn.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = 'scraper_batches'
-        """).fetchdf()
+@functools.lru_cache(maxsize=None)
+def find_class(module_file: str, class_name: str) -> ast.ClassDef | None:
+    """Find a top-level class definition in source via ast, without importing the module."""
+    tree = ast.parse((PROJECT_ROOT / module_file).read_text(encoding="utf-8"))
+    return next(
+        (node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == class_name),
+        None,
+    )
 
-        column_names = schema['column_name'].tolist()
 
-        # Check for Phase 1 enhancement column
-        assert 'region' in column_names, \
-            "Missing region column in scraper_batches"
+# ─────────────────────────────────────────────────────────────────────
+# Schema Tests
+# ─────────────────────────────────────────────────────────────────────
+
+def test_schema_includes_discovery_columns(schema_cache):
+    """Verify scraper_runs table has discovery-phase tracking columns."""
+    column_names = schema_cache["scraper_runs"]
+
+    # Check for Phase 1 enhancement columns
+    assert 'discovery_started_at' in column_names, \
+        "Missing discovery_started_at column"
+    assert 'discovery_finished_at' in column_names, \
+        "Missing discovery_finished_at column"
+    assert 'discovery_duration_seconds' in column_names, \
+        "Missing discovery_duration_seconds column"
+    assert 'discovery_mode' in column_names, \
+        "Missing discovery_mode column"
+
+
+def test_schema_includes_region_in_batches(schema_cache):
+    """Verify scraper_batches table has region column."""
+    column_names = schema_cache["scraper_batches"]
+
+    # Check for Phase 1 enhancement column
+    assert 'region' in column_names, \
+        "Missing region column in scraper_batches"
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Discovery Tracking Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_start_discovery_updates_db(metrics_collector, temp_db):
+def test_start_discovery_updates_db(metrics_collector, db_cursor):
     """Test that start_discovery() updates the database correctly."""
     # Start a run first
     run_id = "test_run_20260205_120000"
@@ -102,19 +168,14 @@ def test_start_discovery_updates_db(metrics_collector, temp_db):
     metrics_collector.start_discovery(discovery_mode="sitemap")
 
     # Verify database update
-    with duckdb.connect(temp_db) as conn:
-        result = conn.execute("""
-            SELECT discovery_started_at, discovery_mode
-            FROM scraper_runs
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
+    run = fetch_run(db_cursor, run_id)
 
-        assert result is not None, "Run not found in database"
-        assert result[0] is not None, "discovery_started_at should be set"
-        assert result[1] == "sitemap", "discovery_mode should be 'sitemap'"
+    assert run is not None, "Run not found in database"
+    assert run["discovery_started_at"] is not None, "discovery_started_at should be set"
+    assert run["discovery_mode"] == "sitemap", "discovery_mode should be 'sitemap'"
 
 
-def test_finish_discovery_calculates_duration(metrics_collector, temp_db):
+def test_finish_discovery_calculates_duration(metrics_collector, db_cursor):
     """Test that finish_discovery() calculates duration correctly."""
     import time
 
@@ -128,23 +189,14 @@ def test_finish_discovery_calculates_duration(metrics_collector, temp_db):
     metrics_collector.finish_discovery(products_discovered=1234)
 
     # Verify database update
-    with duckdb.connect(temp_db) as conn:
-        result = conn.execute("""
-            SELECT
-                discovery_finished_at,
-                discovery_duration_seconds,
-                products_discovered,
-                discovery_mode
-            FROM scraper_runs
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
-
-        assert result is not None, "Run not found"
-        assert result[0] is not None, "discovery_finished_at should be set"
-        assert result[1] is not None, "discovery_duration_seconds should be set"
-        assert result[1] >= 0.1, "duration should be at least 0.1 seconds"
-        assert result[2] == 1234, "products_discovered should be 1234"
-        assert result[3] == "category_tree", "discovery_mode should be preserved"
+    run = fetch_run(db_cursor, run_id)
+
+    assert run is not None, "Run not found"
+    assert run["discovery_finished_at"] is not None, "discovery_finished_at should be set"
+    assert run["discovery_duration_seconds"] is not None, "discovery_duration_seconds should be set"
+    assert run["discovery_duration_seconds"] >= 0.1, "duration should be at least 0.1 seconds"
+    assert run["products_discovered"] == 1234, "products_discovered should be 1234"
+    assert run["discovery_mode"] == "category_tree", "discovery_mode should be preserved"
 
 
 def test_discovery_tracking_requires_active_run(metrics_collector):
@@ -160,7 +212,7 @@ def test_discovery_tracking_requires_active_run(metrics_collector):
 # Batch Tracking with Region Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_record_batch_with_region(metrics_collector, temp_db):
+def test_record_batch_with_region(metrics_collector, db_cursor):
     """Test that record_batch() stores region correctly."""
     run_id = "test_run_20260205_120002"
     metrics_collector.start_run(run_id, "giassi", region="florianopolis_santa_monica")
@@ -176,21 +228,17 @@ def test_record_batch_with_region(metrics_collector, temp_db):
     )
 
     # Verify database
-    with duckdb.connect(temp_db) as conn:
-        result = conn.execute("""
-            SELECT region, products_count, api_status_code, response_time_ms
-            FROM scraper_batches
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
+    batches = fetch_batches(db_cursor, run_id)
 
-        assert result is not None, "Batch not found"
-        assert result[0] == "florianopolis_santa_monica", "Region should match"
-        assert result[1] == 50, "products_count should be 50"
-        assert result[2] == 200, "api_status_code should be 200"
-        assert result[3] == 234.5, "response_time_ms should match"
+    assert batches, "Batch not found"
+    batch = batches[0]
+    assert batch["region"] == "florianopolis_santa_monica", "Region should match"
+    assert batch["products_count"] == 50, "products_count should be 50"
+    assert batch["api_status_code"] == 200, "api_status_code should be 200"
+    assert batch["response_time_ms"] == 234.5, "response_time_ms should match"
 
 
-def test_record_batch_uses_current_region_as_fallback(metrics_collector, temp_db):
+def test_record_batch_uses_current_region_as_fallback(metrics_collector, db_cursor):
     """Test that record_batch() uses current_region if region not provided."""
     run_id = "test_run_20260205_120003"
     metrics_collector.start_run(run_id, "bistek", region="criciuma_centro")
@@ -203,19 +251,14 @@ def test_record_batch_uses_current_region_as_fallback(metrics_collector, temp_db
     )
 
     # Verify it uses current_region
-    with duckdb.connect(temp_db) as conn:
-        result = conn.execute("""
-            SELECT region
-            FROM scraper_batches
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
+    batches = fetch_batches(db_cursor, run_id)
 
-        assert result is not None, "Batch not found"
-        assert result[0] == "criciuma_centro", \
-            "Region should fallback to current_region"
+    assert batches, "Batch not found"
+    assert batches[0]["region"] == "criciuma_centro", \
+        "Region should fallback to current_region"
 
 
-def test_track_batch_context_manager_with_region(metrics_collector, temp_db):
+def test_track_batch_context_manager_with_region(metrics_collector, db_cursor):
     """Test that track_batch() context manager accepts and uses region."""
     run_id = "test_run_20260205_120004"
     metrics_collector.start_run(run_id, "fort", region="itajai_saojoao")
@@ -226,25 +269,21 @@ def test_track_batch_context_manager_with_region(metrics_collector, temp_db):
         batch.api_status_code = 206
 
     # Verify database
-    with duckdb.connect(temp_db) as conn:
-        result = conn.execute("""
-            SELECT region, products_count, api_status_code, success
-            FROM scraper_batches
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
+    batches = fetch_batches(db_cursor, run_id)
 
-        assert result is not None, "Batch not found"
-        assert result[0] == "itajai_saojoao", "Region should match"
-        assert result[1] == 30, "products_count should be 30"
-        assert result[2] == 206, "api_status_code should be 206"
-        assert result[3] is True, "success should be True"
+    assert batches, "Batch not found"
+    batch = batches[0]
+    assert batch["region"] == "itajai_saojoao", "Region should match"
+    assert batch["products_count"] == 30, "products_count should be 30"
+    assert batch["api_status_code"] == 206, "api_status_code should be 206"
+    assert batch["success"] is True, "success should be True"
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Integration Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_full_run_with_discovery_tracking(metrics_collector, temp_db):
+def test_full_run_with_discovery_tracking(metrics_collector, db_cursor):
     """Test complete run workflow with discovery tracking."""
     import time
 
@@ -272,88 +311,71 @@ def test_full_run_with_discovery_tracking(metrics_collector, temp_db):
     )
 
     # Verify complete workflow
-    with duckdb.connect(temp_db) as conn:
-        # Check run
-        run = conn.execute("""
-            SELECT
-                status,
-                discovery_mode,
-                discovery_duration_seconds,
-                products_discovered,
-                products_scraped,
-                duration_seconds
-            FROM scraper_runs
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
-
-        assert run is not None, "Run not found"
-        assert run[0] == "success", "Status should be success"
-        assert run[1] == "sitemap", "Discovery mode should match"
-        assert run[2] >= 0.05, "Discovery duration should be >= 0.05s"
-        assert run[3] == 500, "products_discovered should match"
-        assert run[4] == 150, "products_scraped should match"
-        assert run[5] is not None, "duration_seconds should be set"
-
-        # Check batches
-        batches = conn.execute("""
-            SELECT COUNT(*), SUM(products_count)
-            FROM scraper_batches
-            WHERE run_id = ?
-        """, [run_id]).fetchone()
-
-        assert batches[0] == 3, "Should have 3 batches"
-        assert batches[1] == 150, "Total products should be 150"
+    # Run and batch aggregates in a single round-trip
+    row = db_cursor.execute("""
+        SELECT
+            r.status,
+            r.discovery_mode,
+            r.discovery_duration_seconds,
+            r.products_discovered,
+            r.products_scraped,
+            r.duration_seconds,
+            (SELECT COUNT(*) FROM scraper_batches b WHERE b.run_id = r.run_id),
+            (SELECT SUM(products_count) FROM scraper_batches b WHERE b.run_id = r.run_id)
+        FROM scraper_runs r
+        WHERE r.run_id = ?
+    """, [run_id]).fetchone()
+
+    assert row is not None, "Run not found"
+    (
+        status, discovery_mode, discovery_duration, products_discovered,
+        products_scraped, duration, batch_count, batch_products,
+    ) = row
+
+    # Check run
+    assert status == "success", "Status should be success"
+    assert discovery_mode == "sitemap", "Discovery mode should match"
+    assert discovery_duration >= 0.05, "Discovery duration should be >= 0.05s"
+    assert products_discovered == 500, "products_discovered should match"
+    assert products_scraped == 150, "products_scraped should match"
+    assert duration is not None, "duration_seconds should be set"
+
+    # Check batches
+    assert batch_count == 3, "Should have 3 batches"
+    assert batch_products == 150, "Total products should be 150"
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Deprecation Warning Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_legacy_scrapers_show_deprecation_warning():
-    """Test that importing legacy scrapers shows deprecation warning."""
-    with warnings.catch_warnings(record=True) as w:
-        warnings.simplefilter("always")
-
-        # Import legacy module
-        import src.scrapers
+def test_legacy_scrapers_package_removed():
+    """Test that the deprecated src.scrapers package is gone, not just deprecated."""
+    with pytest.raises(ModuleNotFoundError):
+        importlib.import_module("src.scrapers")
 
-        # Check that a deprecation warning was raised
-        assert len(w) >= 1, "Should raise at least one warning"
-        assert issubclass(w[0].category, DeprecationWarning), \
-            "Should be a DeprecationWarning"
-        assert "deprecated" in str(w[0].message).lower(), \
-            "Warning message should mention deprecation"
-        assert "src.ingest.scrapers" in str(w[0].message), \
-            "Warning should point to new location"
 
+def test_vtex_scraper_lives_in_ingest_package():
+    """Test that VTEXScraper is defined in src/ingest/scrapers, not the removed legacy package."""
+    assert find_class("src/ingest/scrapers/vtex.py", "VTEXScraper") is not None, \
+        "VTEXScraper should be defined in src/ingest/scrapers/vtex.py"
+    assert not (PROJECT_ROOT / "src/scrapers/vtex.py").exists(), \
+        "Legacy src/scrapers/vtex.py should be gone (moved to src.ingest.scrapers)"
 
-def test_legacy_vtex_scraper_has_deprecation_notice():
-    """Test that legacy VTEXScraper docstring mentions deprecation."""
-    from src.scrapers.vtex import VTEXScraper
 
-    docstring = VTEXScraper.__doc__
-    assert "DEPRECATED" in docstring, \
-        "VTEXScraper docstring should mention DEPRECATED"
-    assert "src.ingest.scrapers" in docstring, \
-        "Should point to new location"
-
-
-def test_legacy_base_scraper_has_deprecation_notice():
-    """Test that legacy BaseScraper docstring mentions deprecation."""
-    from src.scrapers.base import BaseScraper
-
-    docstring = BaseScraper.__doc__
-    assert "DEPRECATED" in docstring, \
-        "BaseScraper docstring should mention DEPRECATED"
-    assert "src.ingest.scrapers" in docstring, \
-        "Should point to new location"
+def test_base_scraper_lives_in_ingest_package():
+    """Test that BaseScraper is defined in src/ingest/scrapers, not the removed legacy package."""
+    assert find_class("src/ingest/scrapers/base.py", "BaseScraper") is not None, \
+        "BaseScraper should be defined in src/ingest/scrapers/base.py"
+    assert not (PROJECT_ROOT / "src/scrapers/base.py").exists(), \
+        "Legacy src/scrapers/base.py should be gone (moved to src.ingest.scrapers)"
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Performance Analysis Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_analytics_queries_run_without_error(temp_db):
+def test_analytics_queries_run_without_error(temp_db, monkeypatch):
     """Test that analytics queries execute successfully with sample data."""
     # Create sample data
     collector = MetricsCollector(db_path=temp_db)
@@ -381,28 +403,22 @@ def test_analytics_queries_run_without_error(temp_db):
     # Test that queries run
     from src.observability import analytics_queries
 
-    # Temporarily override DB_PATH for testing
-    original_db_path = analytics_queries.DB_PATH
-    analytics_queries.DB_PATH = temp_db
-
-    try:
-        # These should not raise exceptions
-        df1 = analytics_queries.get_discovery_performance(days=7)
-        assert not df1.empty, "Should have discovery data"
+    # Point queries at the test DB (monkeypatch restores it after the test)
+    monkeypatch.setattr(analytics_queries, "DB_PATH", temp_db)
 
-        df2 = analytics_queries.get_batch_performance_by_region(days=7)
-        assert not df2.empty, "Should have batch data"
+    # These should not raise exceptions
+    df1 = analytics_queries.get_discovery_performance(days=7)
+    assert not df1.empty, "Should have discovery data"
 
-        df3 = analytics_queries.get_run_performance_summary(days=7)
-        assert not df3.empty, "Should have run data"
+    df2 = analytics_queries.get_batch_performance_by_region(days=7)
+    assert not df2.empty, "Should have batch data"
 
-        # Test optimization recommendations
-        recommendations = analytics_queries.get_optimization_recommendations(days=7)
-        assert 'recommendations' in recommendations, "Should have recommendations key"
+    df3 = analytics_queries.get_run_performance_summary(days=7)
+    assert not df3.empty, "Should have run data"
 
-    finally:
-        # Restore original DB_PATH
-        analytics_queries.DB_PATH = original_db_path
+    # Test optimization recommendations
+    recommendations = analytics_queries.get_optimization_recommendations(days=7)
+    assert 'recommendations' in recommendations, "Should have recommendations key"
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -9,12 +9,16 @@ Run with: pytest tests/unit/test_html_schemas.py -v
 """
 
 import pytest
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
 from src.schemas.superkoch import SuperKochProduct
 from src.schemas.hippo import HippoProduct
 
 
+# Validates a whole batch in one call; errors carry the failing index in loc[0]
+HIPPO_BATCH = TypeAdapter(list[HippoProduct])
+
+
 # ─────────────────────────────────────────────────────────────────────
 # Osuper Platform Product Tests (SuperKoch and Hippo use same base schema)
 # ─────────────────────────────────────────────────────────────────────
@@ -348,18 +352,16 @@ class TestSchemaBatchValidation:
             {"productId": "3", "productName": "Valid", "price": 30.0, "available": True, "stock": 10, "productUrl": "https://hippo.com.br/3", "storeId": "1", "scrapedAt": "2026-02-07T20:00:00", "platform": "osuper"},
         ]
 
-        valid_products = []
-        invalid_count = 0
+        with pytest.raises(ValidationError) as exc_info:
+            HIPPO_BATCH.validate_python(products_data)
 
-        for data in products_data:
-            try:
-                product = HippoProduct(**data)
-                valid_products.append(product)
-            except ValidationError:
-                invalid_count += 1
+        bad_indices = {err["loc"][0] for err in exc_info.value.errors()}
+        valid_products = HIPPO_BATCH.validate_python(
+            [data for i, data in enumerate(products_data) if i not in bad_indices]
+        )
 
         assert len(valid_products) == 2
-        assert invalid_count == 1
+        assert bad_indices == {1}
 
     def test_mixed_osuper_stores_batch(self):
         """Test batch with mixed Osuper platform stores (SuperKoch and Hippo)."""
@@ -10,9 +10,12 @@ Tests validate that:
 Run with: pytest tests/unit/test_schemas.py -v
 """
 
+import pickle
+
 import pytest
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
+from src.schemas import vtex as vtex_schemas
 from src.schemas.vtex import (
     VTEXProduct,
     VTEXItem,
@@ -23,56 +26,49 @@ from src.schemas.vtex import (
     VTEXCategoryTree,
 )
 
+# Leaf schemas are TypedDicts, validated through adapters
+OFFER = TypeAdapter(VTEXOffer)
+IMAGE = TypeAdapter(VTEXImage)
+
 
 # ─────────────────────────────────────────────────────────────────────
 # VTEXOffer Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_offer_valid():
+def test_offer_valid(valid_offer_data):
     """Test that a valid offer passes validation."""
-    offer_data = {
-        "Price": 10.50,
-        "ListPrice": 12.00,
-        "AvailableQuantity": 100,
-    }
-    offer = VTEXOffer.parse_obj(offer_data)
-    assert offer.Price == 10.50
-    assert offer.ListPrice == 12.00
-    assert offer.AvailableQuantity == 100
+    offer_data = {**valid_offer_data, "ListPrice": 12.00}
+    offer = OFFER.validate_python(offer_data)
+    assert offer["Price"] == 10.50
+    assert offer["ListPrice"] == 12.00
+    assert offer["AvailableQuantity"] == 100
 
 
-def test_offer_price_must_be_positive():
+def test_offer_price_must_be_positive(valid_offer_data):
     """Test that Price must be > 0."""
-    offer_data = {
-        "Price": 0,
-        "AvailableQuantity": 100,
-    }
+    offer_data = {**valid_offer_data, "Price": 0}
     with pytest.raises(ValidationError) as exc_info:
-        VTEXOffer.parse_obj(offer_data)
+        OFFER.validate_python(offer_data)
 
     errors = exc_info.value.errors()
     assert any(e['loc'] == ('Price',) for e in errors)
 
 
-def test_offer_list_price_defaults_to_price():
+def test_offer_list_price_defaults_to_price(valid_offer_data):
     """Test that ListPrice defaults to Price if missing."""
-    offer_data = {
-        "Price": 10.50,
-        "AvailableQuantity": 100,
-    }
-    offer = VTEXOffer.parse_obj(offer_data)
-    assert offer.ListPrice == 10.50  # Should default to Price
+    offer = OFFER.validate_python(valid_offer_data)
+    assert offer["ListPrice"] == 10.50  # Should default to Price
 
 
-def test_offer_list_price_cannot_be_less_than_price():
+def test_offer_list_price_cannot_be_less_than_price(valid_offer_data):
     """Test that ListPrice >= Price validation works."""
     offer_data = {
+        **valid_offer_data,
         "Price": 12.00,
         "ListPrice": 10.00,  # Invalid: ListPrice < Price
-        "AvailableQuantity": 100,
     }
     with pytest.raises(ValidationError) as exc_info:
-        VTEXOffer.parse_obj(offer_data)
+        OFFER.validate_python(offer_data)
 
     errors = exc_info.value.errors()
     assert any('ListPrice' in str(e) for e in errors)
@@ -88,9 +84,9 @@ def test_image_valid():
         "imageId": "123",
         "imageUrl": "https://example.com/image.jpg",
     }
-    image = VTEXImage.parse_obj(image_data)
-    assert image.imageId == "123"
-    assert image.imageUrl == "https://example.com/image.jpg"
+    image = IMAGE.validate_python(image_data)
+    assert image["imageId"] == "123"
+    assert image["imageUrl"] == "https://example.com/image.jpg"
 
 
 def test_image_url_empty_fails():
@@ -100,7 +96,7 @@ def test_image_url_empty_fails():
         "imageUrl": "",
     }
     with pytest.raises(ValidationError):
-        VTEXImage.parse_obj(image_data)
+        IMAGE.validate_python(image_data)
 
 
 def test_image_url_http_converted_to_https():
@@ -109,102 +105,55 @@ def test_image_url_http_converted_to_https():
         "imageId": "123",
         "imageUrl": "http://example.com/image.jpg",
     }
-    image = VTEXImage.parse_obj(image_data)
-    assert image.imageUrl == "https://example.com/image.jpg"
+    image = IMAGE.validate_python(image_data)
+    assert image["imageUrl"] == "https://example.com/image.jpg"
 
 
 # ─────────────────────────────────────────────────────────────────────
 # VTEXSeller Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_seller_valid():
+def test_seller_valid(valid_seller_data):
     """Test that a valid seller passes validation."""
-    seller_data = {
-        "sellerId": "1",
-        "sellerName": "Test Seller",
-        "commertialOffer": {
-            "Price": 10.50,
-            "AvailableQuantity": 100,
-        }
-    }
-    seller = VTEXSeller.parse_obj(seller_data)
+    seller = VTEXSeller.model_validate(valid_seller_data)
     assert seller.sellerId == "1"
     assert seller.sellerName == "Test Seller"
-    assert seller.commertialOffer.Price == 10.50
+    assert seller.commertialOffer["Price"] == 10.50
 
 
-def test_seller_id_cannot_be_empty():
+def test_seller_id_cannot_be_empty(valid_seller_data):
     """Test that sellerId cannot be empty."""
-    seller_data = {
-        "sellerId": "",
-        "sellerName": "Test Seller",
-        "commertialOffer": {
-            "Price": 10.50,
-            "AvailableQuantity": 100,
-        }
-    }
+    seller_data = {**valid_seller_data, "sellerId": ""}
     with pytest.raises(ValidationError):
-        VTEXSeller.parse_obj(seller_data)
+        VTEXSeller.model_validate(seller_data)
 
 
 # ─────────────────────────────────────────────────────────────────────
 # VTEXItem Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_item_valid():
+def test_item_valid(valid_item_data):
     """Test that a valid item passes validation."""
-    item_data = {
-        "itemId": "123",
-        "name": "Test Product",
-        "ean": "1234567890123",
-        "sellers": [
-            {
-                "sellerId": "1",
-                "sellerName": "Test Seller",
-                "commertialOffer": {
-                    "Price": 10.50,
-                    "AvailableQuantity": 100,
-                }
-            }
-        ],
-    }
-    item = VTEXItem.parse_obj(item_data)
+    item_data = {**valid_item_data, "ean": "1234567890123"}
+    item = VTEXItem.model_validate(item_data)
     assert item.itemId == "123"
-    assert item.name == "Test Product"
+    assert item.name == "Test Product SKU"
     assert item.ean == "1234567890123"
     assert len(item.sellers) == 1
 
 
-def test_item_ean_cleaning():
+def test_item_ean_cleaning(valid_item_data):
     """Test that EAN is cleaned (non-digits removed)."""
-    item_data = {
-        "itemId": "123",
-        "name": "Test Product",
-        "ean": "1234-5678-90123",  # Has dashes
-        "sellers": [
-            {
-                "sellerId": "1",
-                "sellerName": "Test Seller",
-                "commertialOffer": {
-                    "Price": 10.50,
-                    "AvailableQuantity": 100,
-                }
-            }
-        ],
-    }
-    item = VTEXItem.parse_obj(item_data)
+    item_data = {**valid_item_data, "ean": "1234-5678-90123"}  # Has dashes
+    item = VTEXItem.model_validate(item_data)
     assert item.ean == "1234567890123"  # Cleaned
 
 
-def test_item_must_have_at_least_one_seller():
+def test_item_must_have_at_least_one_seller(valid_item_data):
     """Test that items must have at least one seller."""
-    item_data = {
-        "itemId": "123",
-        "name": "Test Product",
-        "sellers": [],  # Empty sellers
-    }
+    item_data = {**valid_item_data, "sellers": []}  # Empty sellers
     with pytest.raises(ValidationError) as exc_info:
-        VTEXItem.parse_obj(item_data)
+        VTEXItem.model_validate(item_data)
 
     errors = exc_info.value.errors()
     assert any('sellers' in str(e) for e in errors)
@@ -214,131 +163,40 @@ def test_item_must_have_at_least_one_seller():
 # VTEXProduct Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_product_valid():
+def test_product_valid(valid_product_model):
     """Test that a valid product passes validation."""
-    product_data = {
-        "productId": "1",
-        "productName": "Test Product",
-        "linkText": "test-product",
-        "link": "https://example.com/test-product",
-        "items": [
-            {
-                "itemId": "123",
-                "name": "Test Product SKU",
-                "sellers": [
-                    {
-                        "sellerId": "1",
-                        "sellerName": "Test Seller",
-                        "commertialOffer": {
-                            "Price": 10.50,
-                            "AvailableQuantity": 100,
-                        }
-                    }
-                ],
-            }
-        ],
-    }
-    product = VTEXProduct.parse_obj(product_data)
+    product = valid_product_model
     assert product.productId == "1"
     assert product.productName == "Test Product"
     assert len(product.items) == 1
 
 
-def test_product_name_cannot_be_empty():
+def test_product_name_cannot_be_empty(valid_product_data):
     """Test that productName cannot be empty."""
-    product_data = {
-        "productId": "1",
-        "productName": "",
-        "linkText": "test-product",
-        "link": "https://example.com/test-product",
-        "items": [
-            {
-                "itemId": "123",
-                "name": "Test Product SKU",
-                "sellers": [
-                    {
-                        "sellerId": "1",
-                        "sellerName": "Test Seller",
-                        "commertialOffer": {
-                            "Price": 10.50,
-                            "AvailableQuantity": 100,
-                        }
-                    }
-                ],
-            }
-        ],
-    }
+    product_data = {**valid_product_data, "productName": ""}
     with pytest.raises(ValidationError):
-        VTEXProduct.parse_obj(product_data)
+        VTEXProduct.model_validate(product_data)
 
 
-def test_product_name_too_long():
+def test_product_name_too_long(valid_product_data):
     """Test that productName cannot exceed 500 chars."""
-    product_data = {
-        "productId": "1",
-        "productName": "A" * 501,  # 501 chars
-        "linkText": "test-product",
-        "link": "https://example.com/test-product",
-        "items": [
-            {
-                "itemId": "123",
-                "name": "Test Product SKU",
-                "sellers": [
-                    {
-                        "sellerId": "1",
-                        "sellerName": "Test Seller",
-                        "commertialOffer": {
-                            "Price": 10.50,
-                            "AvailableQuantity": 100,
-                        }
-                    }
-                ],
-            }
-        ],
-    }
+    product_data = {**valid_product_data, "productName": "A" * 501}  # 501 chars
     with pytest.raises(ValidationError):
-        VTEXProduct.parse_obj(product_data)
+        VTEXProduct.model_validate(product_data)
 
 
-def test_product_link_http_converted_to_https():
+def test_product_link_http_converted_to_https(valid_product_data):
     """Test that HTTP links are upgraded to HTTPS."""
-    product_data = {
-        "productId": "1",
-        "productName": "Test Product",
-        "linkText": "test-product",
-        "link": "http://example.com/test-product",  # HTTP
-        "items": [
-            {
-                "itemId": "123",
-                "name": "Test Product SKU",
-                "sellers": [
-                    {
-                        "sellerId": "1",
-                        "sellerName": "Test Seller",
-                        "commertialOffer": {
-                            "Price": 10.50,
-                            "AvailableQuantity": 100,
-                        }
-                    }
-                ],
-            }
-        ],
-    }
-    product = VTEXProduct.parse_obj(product_data)
+    product_data = {**valid_product_data, "link": "http://example.com/test-product"}  # HTTP
+    product = VTEXProduct.model_validate(product_data)
     assert product.link == "https://example.com/test-product"
 
 
-def test_product_must_have_at_least_one_item():
+def test_product_must_have_at_least_one_item(valid_product_data):
     """Test that products must have at least one item."""
-    product_data = {
-        "productId": "1",
-        "productName": "Test Product",
-        "linkText": "test-product",
-        "link": "https://example.com/test-product",
-        "items": [],  # Empty items
-    }
+    product_data = {**valid_product_data, "items": []}  # Empty items
     with pytest.raises(ValidationError) as exc_info:
-        VTEXProduct.parse_obj(product_data)
+        VTEXProduct.model_validate(product_data)
 
     errors = exc_info.value.errors()
     assert any('items' in str(e) for e in errors)
@@ -363,7 +221,7 @@ def test_category_tree_valid():
             }
         ],
     }
-    category = VTEXCategoryTree.parse_obj(category_data)
+    category = VTEXCategoryTree.model_validate(category_data)
     assert category.id == 1
     assert category.name == "Electronics"
     assert category.hasChildren is True
@@ -378,7 +236,7 @@ def test_category_tree_id_must_be_positive():
         "hasChildren": False,
     }
     with pytest.raises(ValidationError):
-        VTEXCategoryTree.parse_obj(category_data)
+        VTEXCategoryTree.model_validate(category_data)
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -420,7 +278,7 @@ def test_full_product_response():
         ],
     }
 
-    product = VTEXProduct.parse_obj(product_data)
+    product = VTEXProduct.model_validate(product_data)
 
     # Validate main fields
     assert product.productId == "100"
@@ -428,13 +286,41 @@ def test_full_product_response():
 
     # Validate HTTPS conversion
     assert product.link.startswith("https://")
-    assert product.items[0].images[0].imageUrl.startswith("https://")
+    assert product.items[0].images[0]["imageUrl"].startswith("https://")
 
     # Validate offer
     offer = product.items[0].sellers[0].commertialOffer
-    assert offer.Price == 8.99
-    assert offer.ListPrice == 10.50
-    assert offer.ListPrice >= offer.Price  # Cross-field validation
+    assert offer["Price"] == 8.99
+    assert offer["ListPrice"] == 10.50
+    assert offer["ListPrice"] >= offer["Price"]  # Cross-field validation
+
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Precompiled Validator Cache
+# ─────────────────────────────────────────────────────────────────────
+
+def test_schema_cache_round_trip(tmp_path, monkeypatch, valid_product_data):
+    """Test that a freshly dumped cache is loaded and validates products."""
+    cache_path = tmp_path / "_vtex_cache.pkl"
+    cache_path.write_bytes(vtex_schemas.dump_schema_cache())
+    monkeypatch.setattr(vtex_schemas, "SCHEMA_CACHE_PATH", cache_path)
+
+    assert vtex_schemas._load_schema_cache() is True
+    assert VTEXProduct.model_validate(valid_product_data).productId == valid_product_data["productId"]
+
+
+def test_schema_cache_ignored_when_stale(tmp_path, monkeypatch):
+    """Test that a cache built from other sources/versions is not used."""
+    cache = pickle.loads(vtex_schemas.dump_schema_cache())
+    cache["key"] = "stale"
+    cache_path = tmp_path / "_vtex_cache.pkl"
+    cache_path.write_bytes(pickle.dumps(cache))
+    monkeypatch.setattr(vtex_schemas, "SCHEMA_CACHE_PATH", cache_path)
+
+    assert vtex_schemas._load_schema_cache() is False
+    monkeypatch.setattr(vtex_schemas, "SCHEMA_CACHE_PATH", tmp_path / "missing.pkl")
+    assert vtex_schemas._load_schema_cache() is False
 
 
 if __name__ == "__main__":
@@ -11,12 +11,71 @@ Tests validate:
 Run with: pytest tests/unit/test_vtex_scraper.py -v
 """
 
+import asyncio
+import json
+import threading
 import pytest
-from unittest.mock import Mock, patch, MagicMock, call
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 from pathlib import Path
 from pydantic import ValidationError
 
+from src.ingest.scrapers import vtex as vtex_module
 from src.ingest.scrapers.vtex import VTEXScraper, RegionResolver
+from src.schemas.vtex import VTEXProduct
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Lightweight stubs (Mock only where call assertions are needed)
+# ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class FakeResponse:
+    """Just enough of requests.Response for the scraper."""
+    status_code: int = 200
+    content: bytes = b""
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@dataclass
+class FakeMetrics:
+    """MetricsCollector stub: track_batch() yields a plain attribute bag."""
+    batches: list = field(default_factory=list)
+
+    @contextmanager
+    def track_batch(self, batch_number, region=None):
+        batch = SimpleNamespace(
+            batch_number=batch_number, region=region, products_count=0,
+            api_status_code=None, success=True,
+        )
+        self.batches.append(batch)
+        yield batch
+
+
+@pytest.fixture(autouse=True)
+def metrics(mocker):
+    """Every scraper in this module records batches into a FakeMetrics stub."""
+    fake = FakeMetrics()
+    mocker.patch("src.ingest.scrapers.vtex.get_metrics_collector", return_value=fake)
+    return fake
+
+
+@pytest.fixture
+def patched_et(mocker):
+    """The ElementTree module as seen by the scraper, patched."""
+    return mocker.patch("src.ingest.scrapers.vtex.ET")
+
+
+def sitemap_loc(url: str) -> ET.Element:
+    """A parsed <loc> element, as iterparse would yield it."""
+    elem = ET.Element("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")
+    elem.text = url
+    return elem
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -87,6 +146,65 @@ def test_validate_products_mixed_valid_invalid(
     assert scraper.validation_errors_count == 1
 
 
+def test_validate_products_accepts_json_bytes(
+    sample_store_config, mock_vtex_product, mock_vtex_invalid_product
+):
+    """Test that the raw response body is validated without response.json()."""
+    scraper = VTEXScraper("bistek", sample_store_config)
+
+    body = json.dumps([mock_vtex_product, mock_vtex_invalid_product]).encode()
+    validated = scraper.validate_products(body)
+
+    assert [p["productId"] for p in validated] == ["100"]
+    assert scraper.validation_errors_count == 1
+
+
+def test_validate_products_skips_non_list_body(mocker, sample_store_config):
+    """Test that an error object instead of a product list skips the batch."""
+    scraper = VTEXScraper("bistek", sample_store_config)
+    mock_logger = mocker.patch("src.ingest.scrapers.vtex.logger")
+
+    assert scraper.validate_products(b'{"error": "x"}') == []
+    assert mock_logger.error.called
+
+
+def test_validate_products_skips_truncated_body(
+    mocker, sample_store_config, mock_vtex_product
+):
+    """Test that a truncated JSON body skips the batch instead of raising."""
+    scraper = VTEXScraper("bistek", sample_store_config)
+    mock_logger = mocker.patch("src.ingest.scrapers.vtex.logger")
+
+    body = json.dumps([mock_vtex_product]).encode()
+    assert scraper.validate_products(body[: len(body) // 2]) == []
+    assert mock_logger.error.called
+
+
+def test_log_validation_failures_ignores_unindexed_errors(
+    mocker, sample_store_config, mock_vtex_product, mock_vtex_invalid_product
+):
+    """Test that errors without a valid product index are logged, not raised."""
+    from typing import List
+    from pydantic import TypeAdapter
+
+    scraper = VTEXScraper("bistek", sample_store_config)
+    mock_logger = mocker.patch("src.ingest.scrapers.vtex.logger")
+    adapter = TypeAdapter(List[VTEXProduct])
+
+    # Empty loc: the batch itself is not a list
+    with pytest.raises(ValidationError) as not_a_list:
+        adapter.validate_python({"error": "rate limited"})
+    assert scraper._log_validation_failures([mock_vtex_product], not_a_list.value) == set()
+
+    # Index past the end of the products handed in
+    with pytest.raises(ValidationError) as out_of_range:
+        adapter.validate_python([mock_vtex_product, mock_vtex_invalid_product])
+    assert scraper._log_validation_failures([mock_vtex_product], out_of_range.value) == set()
+
+    assert mock_logger.warning.call_count == 2
+    assert scraper.validation_errors_count == 0
+
+
 def test_validate_products_logs_errors(sample_store_config, mock_vtex_invalid_product):
     """Test that validation errors are logged."""
     scraper = VTEXScraper("bistek", sample_store_config)
@@ -100,20 +218,38 @@ def test_validate_products_logs_errors(sample_store_config, mock_vtex_invalid_pr
         assert scraper.validation_errors_count == 1
 
 
-def test_validate_products_handles_unexpected_errors(sample_store_config):
-    """Test that unexpected validation errors are caught."""
+def test_validate_products_handles_unexpected_errors(
+    mocker, sample_store_config, mock_vtex_product
+):
+    """Test that malformed-input errors (TypeError/KeyError) are caught."""
     scraper = VTEXScraper("bistek", sample_store_config)
 
-    # Malformed product that will cause unexpected error
-    malformed_product = {"completely": "invalid"}
+    # Batch call fails outside the schema: falls back to per-product validation,
+    # where the same product fails again and is logged and skipped
+    mocker.patch.object(
+        vtex_module._PRODUCT_LIST_ADAPTER, "validate_python", side_effect=TypeError("bad payload")
+    )
+    mocker.patch.object(VTEXProduct, "model_validate", side_effect=KeyError("items"))
+    mock_logger = mocker.patch("src.ingest.scrapers.vtex.logger")
 
-    with patch("src.ingest.scrapers.vtex.logger") as mock_logger:
-        validated = scraper.validate_products([malformed_product])
+    validated = scraper.validate_products([mock_vtex_product])
 
-        # Should log error and skip product
-        assert len(validated) == 0
-        assert scraper.validation_errors_count == 1
-        assert mock_logger.error.called or mock_logger.warning.called
+    assert len(validated) == 0
+    assert scraper.validation_errors_count == 1
+    assert mock_logger.error.called
+
+
+def test_validate_products_does_not_swallow_other_errors(
+    mocker, sample_store_config, mock_vtex_product
+):
+    """Test that errors other than validation/malformed input propagate."""
+    scraper = VTEXScraper("bistek", sample_store_config)
+    mocker.patch.object(
+        vtex_module._PRODUCT_LIST_ADAPTER, "validate_python", side_effect=RuntimeError("boom")
+    )
+
+    with pytest.raises(RuntimeError):
+        scraper.validate_products([mock_vtex_product])
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -126,6 +262,7 @@ def test_region_resolver_initialization(mock_requests_session):
 
     assert resolver.session == mock_requests_session
     assert resolver.base_url == "https://www.bistek.com.br"
+    assert not hasattr(resolver, "__dict__")  # slotted
 
 
 def test_region_resolver_get_segment_cookie_with_manual_region(mock_requests_session):
@@ -147,10 +284,9 @@ def test_region_resolver_get_segment_cookie_with_manual_region(mock_requests_ses
 def test_region_resolver_get_segment_cookie_api_call(mock_requests_session):
     """Test segment cookie generation via API."""
     # Mock API response
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [{"id": "v2.5BE6A0CEC1DA8E9954E2"}]
-    mock_requests_session.get.return_value = mock_response
+    mock_requests_session.get.return_value = FakeResponse(
+        content=json.dumps([{"id": "v2.5BE6A0CEC1DA8E9954E2"}]).encode()
+    )
 
     resolver = RegionResolver(mock_requests_session, "https://www.bistek.com.br")
 
@@ -164,6 +300,21 @@ def test_region_resolver_get_segment_cookie_api_call(mock_requests_session):
     assert cookie is not None
 
 
+def test_region_resolver_caches_resolved_cookie(mock_requests_session):
+    """Test that a resolved region is looked up only once."""
+    mock_requests_session.get.return_value = FakeResponse(
+        content=json.dumps([{"id": "v2.5BE6A0CEC1DA8E9954E2"}]).encode()
+    )
+
+    resolver = RegionResolver(mock_requests_session, "https://www.bistek.com.br")
+
+    first = resolver.get_segment_cookie(postal_code="88095-000", sales_channel="1")
+    second = resolver.get_segment_cookie(postal_code="88095-000", sales_channel="1")
+
+    assert first == second
+    assert mock_requests_session.get.call_count == 1
+
+
 def test_region_resolver_handles_api_failure(mock_requests_session):
     """Test that API failures are handled gracefully."""
     # Mock API error
@@ -182,54 +333,99 @@ def test_region_resolver_handles_api_failure(mock_requests_session):
 # Discovery Tests
 # ─────────────────────────────────────────────────────────────────────
 
-@patch("src.ingest.scrapers.vtex.ET")
-def test_discover_via_sitemap(mock_et, sample_store_config, mock_requests_session):
+def test_discover_via_sitemap(patched_et, sample_store_config, mock_requests_session):
     """Test sitemap-based discovery."""
     # Mock sitemap XML response
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.content = b"""<?xml version="1.0"?>
+    sitemap = FakeResponse(content=b"""<?xml version="1.0"?>
     <urlset>
         <url><loc>https://www.bistek.com.br/product-1/p</loc></url>
         <url><loc>https://www.bistek.com.br/product-2/p</loc></url>
     </urlset>
-    """
-    mock_requests_session.get.return_value = mock_response
-
-    # Mock XML parsing
-    mock_root = Mock()
-    mock_urls = [
-        Mock(text="https://www.bistek.com.br/product-1/p"),
-        Mock(text="https://www.bistek.com.br/product-2/p"),
-    ]
-    mock_root.findall.return_value = mock_urls
-    mock_et.fromstring.return_value = mock_root
+    """)
+    # Second sitemap page does not exist: discovery stops there
+    mock_requests_session.get.side_effect = [sitemap, FakeResponse(status_code=404)]
+
+    # Mock streaming XML parsing: one "end" event per <loc>
+    patched_et.iterparse.return_value = iter([
+        ("end", sitemap_loc("https://www.bistek.com.br/product-1/p")),
+        ("end", sitemap_loc("https://www.bistek.com.br/product-2/p")),
+        ("end", sitemap_loc("https://www.bistek.com.br/product-1/p")),
+    ])
 
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
 
     product_ids = scraper._discover_via_sitemap(limit=None)
 
-    # Should extract product IDs from URLs
-    assert isinstance(product_ids, list)
-    # Actual extraction logic would parse IDs from URLs
+    # Should extract product IDs from URLs, deduplicated in sitemap order
+    assert product_ids == ["1", "2"]
+    assert mock_requests_session.get.call_count == 2
+
 
+def sitemap_page(*urls: str) -> FakeResponse:
+    """A real sitemap XML page (sitemaps.org namespace) listing the given URLs."""
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return FakeResponse(content=(
+        '<?xml version="1.0"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+    ).encode())
 
-@patch("src.ingest.scrapers.vtex.VTEXScraper._get_department_ids")
-def test_discover_via_categories(mock_get_depts, sample_store_config, mock_requests_session):
+
+def test_discover_via_sitemap_continues_past_duplicate_pages(
+    sample_store_config, mock_requests_session
+):
+    """Test that a page of already-seen IDs does not end discovery."""
+    mock_requests_session.get.side_effect = [
+        sitemap_page("https://www.bistek.com.br/arroz-1/p", "https://www.bistek.com.br/feijao-2/p"),
+        sitemap_page("https://www.bistek.com.br/arroz-1/p"),
+        sitemap_page("https://www.bistek.com.br/cafe-3/p"),
+        FakeResponse(status_code=404),
+    ]
+
+    scraper = VTEXScraper("bistek", sample_store_config)
+    scraper.session = mock_requests_session
+
+    assert scraper._discover_via_sitemap(limit=None) == ["1", "2", "3"]
+    assert mock_requests_session.get.call_count == 4
+
+
+def test_discover_via_sitemap_stops_on_empty_page(sample_store_config, mock_requests_session):
+    """Test that a page without product URLs ends discovery."""
+    mock_requests_session.get.side_effect = [
+        sitemap_page("https://www.bistek.com.br/arroz-1/p"),
+        sitemap_page(),
+    ]
+
+    scraper = VTEXScraper("bistek", sample_store_config)
+    scraper.session = mock_requests_session
+
+    assert scraper._discover_via_sitemap(limit=None) == ["1"]
+    assert mock_requests_session.get.call_count == 2
+
+
+def test_discover_via_sitemap_stops_on_repeated_page(sample_store_config, mock_requests_session):
+    """Test that a server answering every index with the same page ends discovery."""
+    page = sitemap_page("https://www.bistek.com.br/arroz-1/p")
+    mock_requests_session.get.return_value = page
+
+    scraper = VTEXScraper("bistek", sample_store_config)
+    scraper.session = mock_requests_session
+
+    assert scraper._discover_via_sitemap(limit=None) == ["1"]
+    assert mock_requests_session.get.call_count == 2
+
+
+def test_discover_via_categories(mocker, sample_store_config, mock_requests_session):
     """Test category-tree based discovery."""
     # Mock department IDs
-    mock_get_depts.return_value = [1, 2, 3]
+    mocker.patch.object(VTEXScraper, "_get_department_ids", return_value=[1, 2, 3])
 
     # Mock API search response
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [
+    mock_requests_session.get.return_value = FakeResponse(content=json.dumps([
         {"productId": "100"},
         {"productId": "101"},
         {"productId": "102"},
-    ]
-    mock_requests_session.get.return_value = mock_response
+    ]).encode())
 
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
@@ -239,19 +435,21 @@ def test_discover_via_categories(mock_get_depts, sample_store_config, mock_reque
     # Should discover products from categories
     assert isinstance(product_ids, list)
     assert len(product_ids) <= 10  # Respects limit
+    # Every department returns the same products: deduplicated, order kept
+    assert product_ids == ["100", "101", "102"]
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Cookie Management Tests
 # ─────────────────────────────────────────────────────────────────────
 
-def test_set_region_cookie_success(sample_store_config, mock_requests_session):
+def test_set_region_cookie_success(mocker, sample_store_config, mock_requests_session):
     """Test region cookie is set correctly."""
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
 
     # Mock resolver
-    scraper.resolver.get_segment_cookie = Mock(return_value="mock_cookie_value")
+    mocker.patch.object(RegionResolver, "get_segment_cookie", return_value="mock_cookie_value")
 
     success = scraper._set_region_cookie("florianopolis_costeira")
 
@@ -262,13 +460,13 @@ def test_set_region_cookie_success(sample_store_config, mock_requests_session):
     assert call_args[0][1] == "mock_cookie_value"
 
 
-def test_set_region_cookie_failure(sample_store_config, mock_requests_session):
+def test_set_region_cookie_failure(mocker, sample_store_config, mock_requests_session):
     """Test handling of cookie generation failure."""
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
 
     # Mock resolver failure
-    scraper.resolver.get_segment_cookie = Mock(return_value=None)
+    mocker.patch.object(RegionResolver, "get_segment_cookie", return_value=None)
 
     success = scraper._set_region_cookie("florianopolis_costeira")
 
@@ -279,28 +477,21 @@ def test_set_region_cookie_failure(sample_store_config, mock_requests_session):
 # Integration Tests (with mocked metrics)
 # ─────────────────────────────────────────────────────────────────────
 
-@patch("src.ingest.scrapers.vtex.get_metrics_collector")
 def test_scrape_by_ids_with_validation(
-    mock_get_metrics, sample_store_config, mock_requests_session, mock_vtex_product, temp_dir
+    mocker, metrics, sample_store_config, mock_requests_session, mock_vtex_product, temp_dir
 ):
     """Test _scrape_by_ids integrates with validation."""
-    # Mock metrics collector
-    mock_metrics = Mock()
-    mock_metrics.track_batch = MagicMock()
-    mock_get_metrics.return_value = mock_metrics
-
     # Mock API response
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [mock_vtex_product]
-    mock_requests_session.get.return_value = mock_response
+    mock_requests_session.get.return_value = FakeResponse(
+        content=json.dumps([mock_vtex_product]).encode()
+    )
 
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
     scraper.output_base = temp_dir
 
     # Mock resolver
-    scraper.resolver.get_segment_cookie = Mock(return_value="mock_cookie")
+    mocker.patch.object(RegionResolver, "get_segment_cookie", return_value="mock_cookie")
 
     product_ids = ["100"]
 
@@ -311,32 +502,79 @@ def test_scrape_by_ids_with_validation(
 
     # Validation should have been called
     assert scraper.validation_errors_count == 0
+    assert metrics.batches[0].products_count == 1
+
+
+def test_scrape_by_ids_async_fetches_every_batch(
+    mocker, metrics, sample_store_config, mock_vtex_product
+):
+    """Test the aiohttp path fetches, validates and saves each batch."""
+    from aiohttp import web
+
+    requested = []
+
+    async def search(request):
+        requested.append(request.query["fq"])
+        assert "vtex_segment" in request.cookies
+        return web.json_response([mock_vtex_product])
+
+    config = dict(sample_store_config, use_async=True, max_concurrent_requests=2)
+    scraper = VTEXScraper("bistek", config)
+    scraper.batch_size = 1
+    mocker.patch.object(RegionResolver, "get_segment_cookie", return_value="mock_cookie")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/api/catalog_system/pub/products/search", search)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        scraper.base_url = f"http://127.0.0.1:{port}"
+        try:
+            await scraper._scrape_by_ids_async("florianopolis_costeira", ["100", "101", "102"])
+        finally:
+            await runner.cleanup()
+
+    loop_threads = set()
+    save_threads = []
+
+    def save_batch(*args):
+        save_threads.append(threading.get_ident())
+
+    async def run_and_record():
+        loop_threads.add(threading.get_ident())
+        await run()
+
+    with patch.object(scraper, "save_batch", side_effect=save_batch) as mock_save, \
+         patch.object(scraper, "consolidate_batches"), \
+         patch.object(scraper, "validate_run"):
+        asyncio.run(run_and_record())
+
+    assert sorted(requested) == ["productId:100", "productId:101", "productId:102"]
+    assert mock_save.call_count == 3
+    # Parquet writes happen in worker threads, not on the event loop
+    assert not loop_threads & set(save_threads)
+    assert [b.products_count for b in metrics.batches] == [1, 1, 1]
+    assert scraper.validation_errors_count == 0
 
 
 # ─────────────────────────────────────────────────────────────────────
 # Error Handling Tests
 # ─────────────────────────────────────────────────────────────────────
 
-@patch("src.ingest.scrapers.vtex.get_metrics_collector")
 def test_scrape_by_ids_handles_api_error(
-    mock_get_metrics, sample_store_config, mock_requests_session, temp_dir
+    mocker, metrics, sample_store_config, mock_requests_session, temp_dir
 ):
     """Test that API errors in batch are caught and logged."""
-    # Mock metrics
-    mock_metrics = Mock()
-    mock_batch_context = Mock()
-    mock_batch_context.__enter__ = Mock(return_value=mock_batch_context)
-    mock_batch_context.__exit__ = Mock(return_value=False)
-    mock_metrics.track_batch.return_value = mock_batch_context
-    mock_get_metrics.return_value = mock_metrics
-
     # Mock API error
     mock_requests_session.get.side_effect = Exception("API Connection Error")
 
     scraper = VTEXScraper("bistek", sample_store_config)
     scraper.session = mock_requests_session
     scraper.output_base = temp_dir
-    scraper.resolver.get_segment_cookie = Mock(return_value="mock_cookie")
+    mocker.patch.object(RegionResolver, "get_segment_cookie", return_value="mock_cookie")
 
     product_ids = ["100"]
 
@@ -345,8 +583,9 @@ def test_scrape_by_ids_handles_api_error(
             with patch.object(scraper, 'validate_run'):
                 scraper._scrape_by_ids("florianopolis_costeira", product_ids)
 
-    # Should have logged error
+    # Should have logged error and marked the batch failed
     assert mock_logger.error.called
+    assert metrics.batches[0].success is False
 
 
 if __name__ == "__main__":